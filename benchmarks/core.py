@@ -0,0 +1,465 @@
+"""Microbenchmarks for the pure-Python data path.
+
+Every case runs on synthetic listings of each size in `--sizes`. The median
+time of `--repeat` runs is reported (with the garbage collector off and fast
+cases looped, like `timeit`), plus the peak memory tracemalloc sees during one
+more run:
+
+    python benchmarks/core.py
+    python benchmarks/core.py --sizes 1000,1000000 --only listing
+    python benchmarks/core.py --save baseline.json
+    python benchmarks/core.py --compare baseline.json
+
+With `--compare`, cases whose fastest run got slower, or whose peak memory
+grew, by more than `--threshold` over the baseline are flagged, and the exit
+status is 1.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from functools import cached_property
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional, Sequence
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from burf.listing_service import ListingDigest, diff_listings  # noqa: E402
+from burf.search_index import SearchIndex  # noqa: E402
+from burf.storage.ds import BucketWithPrefix, ColumnarListing  # noqa: E402
+from burf.storage.storage import ALL_FIELDS, Storage  # noqa: E402
+from burf.util import LRUCache, human_readable_bytes  # noqa: E402
+
+BUCKET = "bench-bucket"
+PREFIX = "data/"
+PAGE_SIZE = 1000
+MIN_SAMPLE_SECONDS = 0.02
+WORDS = ("events", "metrics", "part", "shard", "snapshot", "users")
+
+Run = Callable[[], Any]
+
+
+class Dataset:
+    """A synthetic folder of `size` objects, as the listing API returns it."""
+
+    def __init__(self, size: int, seed: int = 0) -> None:
+        rng = random.Random(seed)
+        self.size = size
+        self.names = sorted(
+            f"{PREFIX}{rng.choice(WORDS)}-{i:07d}-{rng.getrandbits(32):08x}.parquet"
+            for i in range(size)
+        )
+        self.sizes = [rng.randrange(1 << 34) for _ in range(size)]
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.updated = [
+            start + timedelta(microseconds=rng.randrange(10**13)) for _ in range(size)
+        ]
+        self.generations = [rng.getrandbits(52) for _ in range(size)]
+
+    @cached_property
+    def entries(self) -> List[BucketWithPrefix]:
+        return [
+            BucketWithPrefix.from_full_prefix(
+                BUCKET,
+                name,
+                is_blob=True,
+                size=size,
+                updated_at=updated,
+                generation=generation,
+            )
+            for name, size, updated, generation in zip(
+                self.names, self.sizes, self.updated, self.generations
+            )
+        ]
+
+    @cached_property
+    def listing(self) -> ColumnarListing:
+        return ColumnarListing(self.entries)
+
+    @cached_property
+    def raw_pages(self) -> List["_RawPage"]:
+        """The JSON items of a delimited listing, split into API pages."""
+        items = [
+            {
+                "name": name,
+                "size": str(size),
+                "updated": updated.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                "generation": str(generation),
+            }
+            for name, size, updated, generation in zip(
+                self.names, self.sizes, self.updated, self.generations
+            )
+        ]
+        return [
+            _RawPage(items[start : start + PAGE_SIZE])
+            for start in range(0, len(items), PAGE_SIZE)
+        ] or [_RawPage()]
+
+    def pages(self) -> Iterator[ColumnarListing]:
+        listing = self.listing
+        for start in range(0, len(listing), PAGE_SIZE):
+            yield listing[start : start + PAGE_SIZE]
+
+
+class _RawPage(list):  # type: ignore[type-arg]
+    """A listing API page: its items plus the folder `prefixes` of the response."""
+
+    prefixes: frozenset[str] = frozenset()
+
+
+class Case(NamedTuple):
+    name: str
+    # Builds the inputs (untimed) and returns the function to time.
+    setup: Callable[..., Run]
+    # Needs a mounted `FileListView`, which `setup` receives as well.
+    needs_view: bool = False
+
+
+CASES: List[Case] = []
+
+
+def case(name: str, *, needs_view: bool = False) -> Callable[..., Any]:
+    def register(setup: Callable[..., Run]) -> Callable[..., Run]:
+        CASES.append(Case(name, setup, needs_view))
+        return setup
+
+    return register
+
+
+@case("BucketWithPrefix()")
+def bench_construct(data: Dataset) -> Run:
+    parts = [name.split("/") for name in data.names]
+    return lambda: [
+        BucketWithPrefix(BUCKET, prefixes, is_blob=True, size=size)
+        for prefixes, size in zip(parts, data.sizes)
+    ]
+
+
+@case("BucketWithPrefix.from_full_prefix")
+def bench_from_full_prefix(data: Dataset) -> Run:
+    return lambda: [
+        BucketWithPrefix.from_full_prefix(BUCKET, name, is_blob=True, size=size)
+        for name, size in zip(data.names, data.sizes)
+    ]
+
+
+@case("BucketWithPrefix.full_path")
+def bench_full_path(data: Dataset) -> Run:
+    entries = data.entries
+    return lambda: [entry.full_path for entry in entries]
+
+
+@case("BucketWithPrefix hash+eq")
+def bench_hash_eq(data: Dataset) -> Run:
+    entries = data.entries
+    # Equal but distinct objects, so lookups compare rather than hit identity.
+    probes = [BucketWithPrefix.from_full_prefix(BUCKET, n, is_blob=True) for n in data.names]
+
+    def run() -> int:
+        seen = set(entries)
+        return sum(probe in seen for probe in probes)
+
+    return run
+
+
+@case("GCS.list_prefix_pages (parse+sort)")
+def bench_list_prefix_pages(data: Dataset) -> Run:
+    from burf.storage.gcs import GCS
+
+    gcs = GCS.__new__(GCS)
+    gcs._list_object_pages = lambda *args, **kwargs: iter(data.raw_pages)  # type: ignore[method-assign]
+    uri = BucketWithPrefix.from_full_prefix(BUCKET, PREFIX)
+    return lambda: ColumnarListing.concat(gcs.list_prefix_pages(uri))
+
+
+@case("ColumnarListing.sorted_by(size)")
+def bench_sort_by_size(data: Dataset) -> Run:
+    listing = data.listing
+    return lambda: listing.sorted_by("size", reverse=True)
+
+
+@case("ColumnarListing to/from bytes")
+def bench_serialize(data: Dataset) -> Run:
+    listing = data.listing
+    return lambda: ColumnarListing.from_bytes(listing.to_bytes())
+
+
+@case("ListingDigest (signature)")
+def bench_digest(data: Dataset) -> Run:
+    pages = list(data.pages())
+
+    def run() -> str:
+        digest = ListingDigest()
+        for page in pages:
+            digest.update(page)
+        return digest.hexdigest()
+
+    return run
+
+
+@case("diff_listings (1% changed)")
+def bench_diff(data: Dataset) -> Run:
+    entries = list(data.entries)
+    rng = random.Random(1)
+    for i in rng.sample(range(len(entries)), len(entries) // 100):
+        old = entries[i]
+        entries[i] = BucketWithPrefix.from_full_prefix(
+            BUCKET, old.full_prefix, is_blob=True, size=(old.size or 0) + 1
+        )
+    old, new = data.listing, ColumnarListing(entries)
+    return lambda: diff_listings(old, new)
+
+
+@case("LRUCache put+get")
+def bench_lru(data: Dataset) -> Run:
+    keys = data.entries
+
+    def run() -> None:
+        # Sized like the cursor position cache: one lookup that hits and one
+        # for a key evicted long ago per insert.
+        cache: LRUCache[BucketWithPrefix, int] = LRUCache(max_entries=100)
+        for i, key in enumerate(keys):
+            cache.put(key, i)
+            cache.get(keys[i - 50])
+            cache.get(keys[i - 500])
+
+    return run
+
+
+@case("human_readable_bytes")
+def bench_human_readable_bytes(data: Dataset) -> Run:
+    return lambda: [human_readable_bytes(size) for size in data.sizes]
+
+
+@case("SearchIndex build+find")
+def bench_search_index(data: Dataset) -> Run:
+    uri = BucketWithPrefix.from_full_prefix(BUCKET, PREFIX)
+    listing = data.listing
+
+    def run() -> Optional[int]:
+        index = SearchIndex.for_listing(uri, listing)
+        return index.find("no such name", 0, fuzzy=True)
+
+    return run
+
+
+@case("FileListView show+render", needs_view=True)
+def bench_file_list_view(data: Dataset, view: Any) -> Run:
+    listing = data.listing
+    height = view.scrollable_content_region.height
+    positions = range(0, max(1, len(listing) - height), max(1, len(listing) // 20))
+
+    def run() -> None:
+        # The watcher on `showing_elems` resets the view; then paint one
+        # screenful at positions spread over the listing.
+        view.showing_elems = listing.copy()
+        for top in positions:
+            view.scroll_to(y=top, animate=False)
+            for y in range(height):
+                view.render_line(y)
+
+    return run
+
+
+class _EmptyStorage(Storage):
+    def list_buckets(self) -> List[BucketWithPrefix]:
+        return []
+
+    def list_prefix_pages(
+        self, uri: BucketWithPrefix, *, match_glob: Optional[str] = None
+    ) -> Iterator[Sequence[BucketWithPrefix]]:
+        return iter([])
+
+    def list_all_blobs_pages(
+        self,
+        uri: BucketWithPrefix,
+        fields: Sequence[str] = ALL_FIELDS,
+        *,
+        start_offset: Optional[str] = None,
+        end_offset: Optional[str] = None,
+        match_glob: Optional[str] = None,
+    ) -> Iterator[List[BucketWithPrefix]]:
+        return iter([])
+
+    def get_project(self) -> str:
+        return "bench"
+
+    def download_to_filename(self, uri: BucketWithPrefix, dest: str) -> None:
+        pass
+
+    def delete_blob(self, uri: BucketWithPrefix) -> None:
+        pass
+
+
+def _time_once(run: Run, loops: int) -> float:
+    """Return the seconds per call of `loops` calls, without the collector."""
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        return (time.perf_counter() - start) / loops
+    finally:
+        gc.enable()
+
+
+def measure(run: Run, repeat: int) -> dict[str, float]:
+    # Fast cases are called in a loop of at least MIN_SAMPLE_SECONDS, like
+    # `timeit` does, so timer resolution and noise do not dominate.
+    loops = 1
+    while True:
+        seconds = _time_once(run, loops)
+        if seconds * loops >= MIN_SAMPLE_SECONDS:
+            break
+        loops *= 10 if seconds * loops * 10 < MIN_SAMPLE_SECONDS else 2
+    timings = [seconds, *(_time_once(run, loops) for _ in range(repeat - 1))]
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {
+        "median_ms": statistics.median(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def run_cases(
+    cases: Sequence[Case],
+    datasets: Sequence[Dataset],
+    repeat: int,
+    results: dict[str, dict[str, Any]],
+    view: Any = None,
+) -> None:
+    for bench in cases:
+        for data in datasets:
+            run = bench.setup(data, view) if bench.needs_view else bench.setup(data)
+            stats = measure(run, repeat)
+            stats["ns_per_item"] = stats["median_ms"] * 1e6 / max(1, data.size)
+            results[f"{bench.name} @ {data.size}"] = stats
+            print(
+                f"{bench.name:38} {data.size:>9,} "
+                f"{stats['median_ms']:10.2f} ms {stats['ns_per_item']:9.0f} ns/item "
+                f"{stats['peak_kib'] / 1024:9.1f} MiB peak",
+                flush=True,
+            )
+
+
+async def run_view_cases(
+    cases: Sequence[Case],
+    datasets: Sequence[Dataset],
+    repeat: int,
+    results: dict[str, dict[str, Any]],
+) -> None:
+    from textual.app import App, ComposeResult
+
+    from burf.file_list_view import FileListView
+
+    class BenchApp(App[None]):
+        def compose(self) -> ComposeResult:
+            yield FileListView(_EmptyStorage(), id="file_list")
+
+        def set_loading(self, is_loading: bool) -> None:
+            pass
+
+    app = BenchApp()
+    async with app.run_test(size=(160, 50)) as pilot:
+        # Let the initial (empty) listing land so it cannot replace ours.
+        await asyncio.sleep(0.2)
+        await pilot.pause()
+        run_cases(cases, datasets, repeat, results, app.query_one(FileListView))
+
+
+def compare(
+    results: dict[str, dict[str, Any]], baseline_path: str, threshold: float
+) -> int:
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    print(f"\ncompared with {baseline_path} (threshold {threshold:.0%}):")
+    regressions = 0
+    for name, stats in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        notes = []
+        # The fastest run is the least disturbed by whatever else the machine does.
+        for key, label in (("min_ms", "time"), ("peak_kib", "memory")):
+            ratio = stats[key] / before[key] if before[key] else 1.0
+            notes.append(f"{label} {ratio:5.2f}x")
+            if ratio > 1 + threshold:
+                notes[-1] += " REGRESSED"
+                regressions += 1
+        print(f"  {name:50} {'  '.join(notes)}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default="1000,10000,100000,1000000",
+        help="comma separated listing sizes (default: 1000,10000,100000,1000000)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case (default: 3)")
+    parser.add_argument(
+        "--only",
+        default=None,
+        help="only run cases whose name contains one of these comma separated words",
+    )
+    parser.add_argument("--save", default=None, help="write the results to this file")
+    parser.add_argument(
+        "--compare", default=None, help="compare with results saved by --save"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.20,
+        help="slowdown counted as a regression by --compare (default: 0.20)",
+    )
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    words = args.only.casefold().split(",") if args.only else [""]
+    cases = [
+        bench for bench in CASES if any(w in bench.name.casefold() for w in words)
+    ]
+    datasets = [Dataset(size) for size in sizes]
+
+    results: dict[str, dict[str, Any]] = {}
+    run_cases([c for c in cases if not c.needs_view], datasets, args.repeat, results)
+    view_cases = [c for c in cases if c.needs_view]
+    if view_cases:
+        asyncio.run(run_view_cases(view_cases, datasets, args.repeat, results))
+
+    if args.save is not None:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "repeat": args.repeat,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+    if args.compare is not None and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Measure how long burf takes to start.
+
+Each case runs in a fresh interpreter, so module imports are not cached
+between runs. The median wall time of `--runs` runs is reported:
+
+    python benchmarks/startup.py --runs 20
+    python benchmarks/startup.py --json startup.json
+
+`import burf.app` is what the TUI loads before drawing its first frame, and
+`import burf.storage.gcs` is the cloud SDK, which is loaded on a background
+thread while the UI starts.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    "python": ["-c", "pass"],
+    "burf --version": ["-m", "burf.burf", "--version"],
+    "burf --help": ["-m", "burf.burf", "--help"],
+    "import burf.app": ["-c", "import burf.app"],
+    "import burf.storage.gcs": ["-c", "import burf.storage.gcs"],
+    "import burf.app + sdk (eager)": [
+        "-c",
+        "import burf.storage.gcs, burf.app",
+    ],
+}
+
+
+def time_case(args: list[str], runs: int) -> list[float]:
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *args],
+            check=True,
+            env=env,
+            stdout=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="runs per case (default: 10)")
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for name, case_args in CASES.items():
+        timings = time_case(case_args, args.runs)
+        results[name] = {
+            "median_ms": round(statistics.median(timings) * 1000, 1),
+            "min_ms": round(min(timings) * 1000, 1),
+        }
+        print(f"{name:32} {results[name]['median_ms']:8.1f} ms (min {results[name]['min_ms']:.1f})")
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump({"runs": args.runs, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
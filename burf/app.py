@@ -0,0 +1,233 @@
+from typing import Any, Optional
+
+from rich.text import Text
+from textual.app import App, ComposeResult
+from textual.binding import Binding
+from textual.containers import Center
+from textual.timer import Timer
+from textual.widgets import Footer, Header, Label
+
+from burf.disk_cache import DiskListingCache
+from burf.error_screen import ErrorScreen
+from burf.file_list_view import FileListView
+from burf.search_box import SearchBox
+from burf.stats_panel import StatsPanel
+from burf.storage.ds import BucketWithPrefix
+from burf.storage.storage import DeferredStorage, Storage
+from burf.storage.tracing import TraceRecorder, TracingStorage
+from burf.string_getter import StringGetter
+from burf.util import get_gcs_bucket_and_prefix
+
+
+def _create_gcs(auth_cache_dir: Optional[str] = None) -> Storage:
+    # Imported here: loading the cloud SDK is the slowest part of startup.
+    from burf.storage.auth_cache import AuthCache
+    from burf.storage.gcs import GCS
+
+    auth_cache = AuthCache.in_dir(auth_cache_dir) if auth_cache_dir else None
+    return GCS(auth_cache=auth_cache)
+
+
+class GSUtilUIApp(App[Any]):
+    BINDINGS = [
+        Binding("ctrl+g", "go_to", "go to address"),
+        Binding("ctrl+d", "download", "download selected"),
+        Binding("ctrl+x", "delete", "delete selected"),
+        Binding("ctrl+u", "disk_usage", "disk usage"),
+        Binding("ctrl+s", "toggle_stats", "stats"),
+        Binding("ctrl+c", "quit", "Quit"),
+    ]
+
+    file_list_view: FileListView
+    search_box: SearchBox
+    stats_panel: StatsPanel
+    loading_spinner: Label
+
+    def __init__(
+        self,
+        uri: BucketWithPrefix,
+        download_workers: int = 8,
+        disk_cache: Optional[DiskListingCache] = None,
+        auth_cache_dir: Optional[str] = None,
+        trace: Optional[TraceRecorder] = None,
+    ):
+        super().__init__()
+
+        def _create_storage() -> Storage:
+            if trace is None:
+                return _create_gcs(auth_cache_dir)
+            with trace.span("setup"):
+                storage = _create_gcs(auth_cache_dir)
+            return TracingStorage(storage, trace)
+
+        self.storage = DeferredStorage(_create_storage)
+        self.storage.start()
+        self.uri = uri
+        self.download_workers = download_workers
+        self.disk_cache = disk_cache
+        self._spinner_timer: Timer | None = None
+        self._spinner_frames = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
+        self._spinner_idx = 0
+
+    def compose(self) -> ComposeResult:
+        self.loading_spinner = Label("", id="loading_spinner")
+        self.loading_spinner.styles.display = "none"
+
+        self.file_list_view = FileListView(
+            storage=self.storage,
+            uri=self.uri,
+            id="file_list",
+            disk_cache=self.disk_cache,
+        )
+        self.search_box = SearchBox(id="search_box")
+        self.stats_panel = StatsPanel(id="stats_panel")
+
+        yield Header()
+        yield self.stats_panel
+        with Center():
+            yield self.loading_spinner
+        yield self.file_list_view
+        yield self.search_box
+        yield Footer()
+
+    def set_loading(self, is_loading: bool) -> None:
+        if is_loading:
+            self._spinner_idx = 0
+            self.loading_spinner.update(f"{self._spinner_frames[self._spinner_idx]} Loading…")
+            self.loading_spinner.styles.display = "block"
+
+            if self._spinner_timer is None:
+                self._spinner_timer = self.set_interval(0.08, self._tick_spinner)
+            else:
+                self._spinner_timer.resume()
+        else:
+            if self._spinner_timer is not None:
+                self._spinner_timer.pause()
+            self.loading_spinner.styles.display = "none"
+
+    def _tick_spinner(self) -> None:
+        self._spinner_idx = (self._spinner_idx + 1) % len(self._spinner_frames)
+        self.loading_spinner.update(f"{self._spinner_frames[self._spinner_idx]} Loading…")
+
+    # screen call-backs
+    def change_addr(self, new_addr: Optional[str]) -> None:
+        if new_addr is not None:
+            uri = get_gcs_bucket_and_prefix(new_addr)
+            self.file_list_view.uri = uri
+            self.file_list_view.refresh_contents()
+
+    # actions
+    def action_go_to(self) -> None:
+        self.push_screen(
+            StringGetter(place_holder="gs://bucket_name/subdir1/subdir2"),
+            self.change_addr,
+        )
+
+    def action_download(self) -> None:
+        from burf.downloader_screen import DownloaderScreen
+
+        selected = self.file_list_view.get_selected_uri()
+
+        if selected is not None:
+            self.push_screen(
+                DownloaderScreen(
+                    selected, self.storage, max_workers=self.download_workers
+                )
+            )
+
+    def action_delete(self) -> None:
+        from burf.deleter_screen import DeleterScreen
+
+        selected = self.file_list_view.get_selected_uri()
+        if selected is None:
+            return
+        if selected.is_bucket:
+            self.push_screen(
+                ErrorScreen(
+                    title="Delete not supported",
+                    message="Deleting buckets is not supported from this UI.",
+                )
+            )
+            return
+        self.push_screen(DeleterScreen(selected, self.storage))
+
+    def action_disk_usage(self) -> None:
+        from burf.du_screen import DiskUsageScreen
+
+        self.push_screen(
+            DiskUsageScreen(
+                self.file_list_view.uri,
+                self.storage,
+                seeds=self.file_list_view.get_child_folder_prefixes(),
+            )
+        )
+
+    def action_toggle_stats(self) -> None:
+        self.stats_panel.toggle()
+
+    # message handlers
+    def on_input_changed(self, value: SearchBox.Changed) -> None:
+        if value.input is self.search_box:
+            self.search_box.search(include_current=True)
+
+    def on_input_submitted(self, value: SearchBox.Submitted) -> None:
+        if value.input is self.search_box:
+            self.search_box.search()
+
+    def on_file_list_view_access_forbidden(
+        self, af: FileListView.AccessForbidden
+    ) -> None:
+        self.push_screen(
+            ErrorScreen(
+                title="Access forbidden",
+                message=(
+                    f"Forbidden to access: {af.path}\n\n"
+                    "This app relies on Application Default Credentials (ADC).\n"
+                    "Authenticate and/or switch identity outside the app (e.g. with gcloud),\n"
+                    "then re-run burf.\n\n"
+                    "Common fix:\n"
+                    "  gcloud auth application-default login\n"
+                ),
+            )
+        )
+
+    def on_file_list_view_setup_failed(self, sf: FileListView.SetupFailed) -> None:
+        # Nothing works without a backend, so quit and say why.
+        self.exit(
+            message=Text(
+                "burf: could not set up Google Cloud Storage: "
+                f"{type(sf.error).__name__}: {sf.error}"
+            )
+        )
+
+    def on_file_list_view_invalid_match_glob(
+        self, im: FileListView.InvalidMatchGlob
+    ) -> None:
+        self.push_screen(
+            ErrorScreen(
+                title="Filter rejected",
+                message=(
+                    f"GCS rejected the filter: {im.match_glob}\n\n"
+                    f"{im.reason}\n\n"
+                    "The filter has been cleared.\n"
+                ),
+            )
+        )
+
+    def on_file_list_view_invalid_project(
+        self, ip: FileListView.InvalidProject
+    ) -> None:
+        self.push_screen(
+            ErrorScreen(
+                title="Invalid GCP project",
+                message=(
+                    f"GCS returned an invalid project error for project: {ip.project}\n\n"
+                    "This app relies on Application Default Credentials (ADC) and does not\n"
+                    "support changing the project from inside the UI.\n\n"
+                    "Fix the active project outside the app, then re-run burf.\n\n"
+                    "Common fixes:\n"
+                    "  gcloud config set project YOUR_PROJECT_ID\n"
+                    "  export GOOGLE_CLOUD_PROJECT=YOUR_PROJECT_ID\n"
+                ),
+            )
+        )
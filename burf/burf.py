@@ -1,172 +1,127 @@
 import argparse
-from typing import Any, Optional
-
-from textual.app import App, ComposeResult
-from textual.binding import Binding
-from textual.containers import Center
-from textual.timer import Timer
-from textual.widgets import Footer, Header, Label
-
-from burf.downloader_screen import DownloaderScreen
-from burf.deleter_screen import DeleterScreen
-from burf.error_screen import ErrorScreen
-from burf.file_list_view import FileListView
-from burf.search_box import SearchBox
+from typing import Any
+
+from burf import __version__
+from burf.disk_cache import DiskListingCache, default_cache_dir
 from burf.storage.ds import BucketWithPrefix
-from burf.storage.storage import GCS
-from burf.string_getter import StringGetter
 from burf.util import get_gcs_bucket_and_prefix
 
 
-class GSUtilUIApp(App[Any]):
-    BINDINGS = [
-        Binding("ctrl+g", "go_to", "go to address"),
-        Binding("ctrl+d", "download", "download selected"),
-        Binding("ctrl+x", "delete", "delete selected"),
-        Binding("ctrl+c", "quit", "Quit"),
-    ]
-
-    file_list_view: FileListView
-    search_box: SearchBox
-    loading_spinner: Label
-
-    def __init__(self, uri: BucketWithPrefix):
-        super().__init__()
-        self.storage = GCS()
-        self.uri = uri
-        self._spinner_timer: Timer | None = None
-        self._spinner_frames = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
-        self._spinner_idx = 0
-
-    def compose(self) -> ComposeResult:
-        self.loading_spinner = Label("", id="loading_spinner")
-        self.loading_spinner.styles.display = "none"
-
-        self.file_list_view = FileListView(
-            storage=self.storage,
-            uri=self.uri,
-            id="file_list",
-        )
-        self.search_box = SearchBox(id="search_box")
-
-        yield Header()
-        with Center():
-            yield self.loading_spinner
-        yield self.file_list_view
-        yield self.search_box
-        yield Footer()
-
-    def set_loading(self, is_loading: bool) -> None:
-        if is_loading:
-            self._spinner_idx = 0
-            self.loading_spinner.update(f"{self._spinner_frames[self._spinner_idx]} Loading…")
-            self.loading_spinner.styles.display = "block"
-
-            if self._spinner_timer is None:
-                self._spinner_timer = self.set_interval(0.08, self._tick_spinner)
-            else:
-                self._spinner_timer.resume()
-        else:
-            if self._spinner_timer is not None:
-                self._spinner_timer.pause()
-            self.loading_spinner.styles.display = "none"
-
-    def _tick_spinner(self) -> None:
-        self._spinner_idx = (self._spinner_idx + 1) % len(self._spinner_frames)
-        self.loading_spinner.update(f"{self._spinner_frames[self._spinner_idx]} Loading…")
-
-    # screen call-backs
-    def change_addr(self, new_addr: Optional[str]) -> None:
-        if new_addr is not None:
-            uri = get_gcs_bucket_and_prefix(new_addr)
-            self.file_list_view.uri = uri
-            self.file_list_view.refresh_contents()
-
-    # actions
-    def action_go_to(self) -> None:
-        self.push_screen(
-            StringGetter(place_holder="gs://bucket_name/subdir1/subdir2"),
-            self.change_addr,
-        )
-
-    def action_download(self) -> None:
-        selected = self.file_list_view.get_selected_uri()
-
-        if selected is not None:
-            self.push_screen(DownloaderScreen(selected, self.storage))
-
-    def action_delete(self) -> None:
-        selected = self.file_list_view.get_selected_uri()
-        if selected is None:
-            return
-        if selected.is_bucket:
-            self.push_screen(
-                ErrorScreen(
-                    title="Delete not supported",
-                    message="Deleting buckets is not supported from this UI.",
-                )
-            )
-            return
-        self.push_screen(DeleterScreen(selected, self.storage))
-
-    # message handlers
-    def on_input_submitted(self, value: SearchBox.Submitted) -> None:
-        self.file_list_view.search_and_highlight(value.input.value)
-
-    def on_file_list_view_access_forbidden(
-        self, af: FileListView.AccessForbidden
-    ) -> None:
-        self.push_screen(
-            ErrorScreen(
-                title="Access forbidden",
-                message=(
-                    f"Forbidden to access: {af.path}\n\n"
-                    "This app relies on Application Default Credentials (ADC).\n"
-                    "Authenticate and/or switch identity outside the app (e.g. with gcloud),\n"
-                    "then re-run burf.\n\n"
-                    "Common fix:\n"
-                    "  gcloud auth application-default login\n"
-                ),
-            )
-        )
-
-    def on_file_list_view_invalid_project(
-        self, ip: FileListView.InvalidProject
-    ) -> None:
-        self.push_screen(
-            ErrorScreen(
-                title="Invalid GCP project",
-                message=(
-                    f"GCS returned an invalid project error for project: {ip.project}\n\n"
-                    "This app relies on Application Default Credentials (ADC) and does not\n"
-                    "support changing the project from inside the UI.\n\n"
-                    "Fix the active project outside the app, then re-run burf.\n\n"
-                    "Common fixes:\n"
-                    "  gcloud config set project YOUR_PROJECT_ID\n"
-                    "  export GOOGLE_CLOUD_PROJECT=YOUR_PROJECT_ID\n"
-                ),
-            )
-        )
+def __getattr__(name: str) -> Any:
+    # The app pulls in textual; keep `burf --help` and `--version` light.
+    if name == "GSUtilUIApp":
+        from burf.app import GSUtilUIApp
+
+        return GSUtilUIApp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def main() -> Any | None:
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--version", action="version", version=f"%(prog)s {__version__}"
+    )
     parser.add_argument(
         "gcs_uri",
         nargs="?",
         help="gcs uri to browse: gs://<bucket>/<subdir1>/<subdir2>",
     )
+    parser.add_argument(
+        "--download-workers",
+        type=int,
+        default=8,
+        help="number of objects to download concurrently (default: 8)",
+    )
+    parser.add_argument(
+        "--disk-cache",
+        action="store_true",
+        help="keep listings on disk so folders from earlier sessions open instantly",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="directory for the on-disk caches (default: ~/.cache/burf)",
+    )
+    parser.add_argument(
+        "--no-auth-cache",
+        action="store_true",
+        help="resolve credentials and project from scratch instead of reusing "
+        "what earlier launches found",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=None,
+        help="append a snapshot of the performance metrics to this JSON Lines "
+        "file every few seconds",
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        metavar="PATH",
+        help="profile the whole session, all threads included, and write the "
+        "stats to PATH (open with `python -m pstats PATH` or snakeviz)",
+    )
+    parser.add_argument(
+        "--trace",
+        default=None,
+        metavar="PATH",
+        help="record every storage call with its timing to PATH as a Chrome "
+        "trace (open in https://ui.perfetto.dev or chrome://tracing)",
+    )
 
     args = parser.parse_args()
+    if args.download_workers < 1:
+        parser.error("--download-workers must be at least 1")
+
+    profiler = None
+    if args.profile:
+        from burf.profiling import SessionProfiler
+
+        profiler = SessionProfiler(args.profile)
+        profiler.start()
+    try:
+        return _run(args)
+    finally:
+        if profiler is not None:
+            profiler.stop()
 
+
+def _run(args: argparse.Namespace) -> Any | None:
     if args.gcs_uri:
         uri = get_gcs_bucket_and_prefix(args.gcs_uri)
     else:
         uri = BucketWithPrefix("", [])
 
-    app = GSUtilUIApp(uri=uri)
+    cache_dir = args.cache_dir or default_cache_dir()
+    disk_cache = None
+    if args.disk_cache:
+        disk_cache = DiskListingCache.in_dir(cache_dir)
+
+    from burf.app import GSUtilUIApp
+    from burf.storage.tracing import TraceRecorder
+
+    trace = TraceRecorder() if args.trace else None
+    app = GSUtilUIApp(
+        uri=uri,
+        download_workers=args.download_workers,
+        disk_cache=disk_cache,
+        auth_cache_dir=None if args.no_auth_cache else cache_dir,
+        trace=trace,
+    )
 
-    return app.run()
+    exporter = None
+    if args.metrics_file:
+        from burf.metrics import JsonlExporter
+
+        exporter = JsonlExporter(args.metrics_file)
+        exporter.start()
+    try:
+        return app.run()
+    finally:
+        if exporter is not None:
+            exporter.stop()
+        if trace is not None:
+            trace.dump(args.trace)
 
 
 if __name__ == "__main__":
@@ -1,14 +1,17 @@
 import threading
 from enum import Enum
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Iterator, Optional
 
+from rich.text import Text
 from textual.app import ComposeResult
 from textual.containers import Center, Container, Horizontal, Middle
 from textual.screen import Screen
+from textual.widget import Widget
 from textual.widgets import Button, Footer, Header, Label, ProgressBar
 
+from burf.metrics import metrics
 from burf.storage.ds import BucketWithPrefix
-from burf.storage.storage import Storage
+from burf.storage.storage import NAME_FIELDS, DeleteResult, Storage
 
 
 class Deleter:
@@ -17,13 +20,15 @@ class Deleter:
         uri: BucketWithPrefix,
         storage: Storage,
         call_before_each_object: Callable[[BucketWithPrefix], Any],
-        call_after_each_object: Callable[[BucketWithPrefix], Any],
+        call_after_each_object: Callable[[DeleteResult], Any],
+        listing_workers: int = 8,
     ) -> None:
         self.uri = uri
         self.stopped = False
         self._call_before = call_before_each_object
         self._call_after = call_after_each_object
         self._storage = storage
+        self.listing_workers = listing_workers
         self._blobs: Optional[list[BucketWithPrefix]] = None
 
     def list_blobs(self) -> list[BucketWithPrefix]:
@@ -31,19 +36,40 @@ class Deleter:
             if self.uri.is_blob:
                 self._blobs = [self.uri]
             else:
-                self._blobs = self._storage.list_all_blobs(self.uri)
+                self._blobs = self._storage.list_all_blobs(
+                    self.uri, NAME_FIELDS, max_workers=self.listing_workers
+                )
         return self._blobs
 
     def number_of_blobs(self) -> int:
         return len(self.list_blobs())
 
     def delete(self) -> None:
-        for blob in self.list_blobs():
-            if self.stopped:
-                break
-            self._call_before(blob)
-            self._storage.delete_blob(blob)
-            self._call_after(blob)
+        """Delete the listed blobs through the storage's bulk delete.
+
+        `call_before_each_object` runs when an object is handed to the storage and
+        `call_after_each_object` receives its `DeleteResult`, possibly from another
+        thread.
+        """
+
+        def _pending() -> Iterator[BucketWithPrefix]:
+            for blob in self.list_blobs():
+                if self.stopped:
+                    return
+                self._call_before(blob)
+                yield blob
+
+        def _on_result(result: DeleteResult) -> None:
+            if result.not_found:
+                metrics.counter("delete.not_found").inc()
+            elif not result.ok:
+                metrics.counter("delete.failed").inc()
+            else:
+                metrics.counter("delete.objects").inc()
+            self._call_after(result)
+
+        with metrics.timed("delete.run"):
+            self._storage.delete_blobs(_pending(), on_result=_on_result)
 
 
 class State(Enum):
@@ -91,43 +117,102 @@ class DeleterScreen(Screen[None]):
         )
         self.state = State.STOPPED
         self._delete_thread: Optional[threading.Thread] = None
+        # Resolved on the UI thread when a delete starts; see `_resolve_file_list`.
+        self._file_list: Optional[Widget] = None
+        self._invalidate: Optional[Callable[[BucketWithPrefix], None]] = None
+        self._not_found = 0
+        self._failed = 0
 
     def start_delete(self) -> None:
-        total = self._deleter.number_of_blobs()
+        try:
+            total = self._deleter.number_of_blobs()
+
+            def _set_total() -> None:
+                self.progress.total = total
 
-        def _set_total() -> None:
-            self.progress.total = total
+            self.app.call_from_thread(_set_total)
 
-        self.app.call_from_thread(_set_total)
+            self._deleter.delete()
+        except Exception as e:
+            error = e
+
+            def _fail() -> None:
+                # Error messages may contain brackets; keep them out of markup.
+                self.label.update(Text(f"Delete failed: {error}{self._summary()}"))
+                self.state = State.STOPPED
+                # Offer to start over.
+                self.question_label.update(Text(f"{self._question()} again?"))
+                self.query_one("#question").styles.display = "block"
+                self._refresh_file_list()
 
-        self._deleter.delete()
+            self._invalidate_deleted()
+            self.app.call_from_thread(_fail)
+            return
+
+        self._invalidate_deleted()
 
         def _finish() -> None:
             if self._deleter.stopped:
-                self.label.update("Delete stopped")
+                self.label.update(f"Delete stopped{self._summary()}")
                 self.state = State.STOPPED
             else:
-                self.label.update("Delete finished")
+                self.label.update(f"Delete finished{self._summary()}")
                 self.state = State.FINISHED
-                # Refresh listing so the deleted object disappears.
-                file_list = self.app.query_one("#file_list")
-                if hasattr(file_list, "clear_cache"):
-                    file_list.clear_cache()
-                if hasattr(file_list, "refresh_contents"):
-                    file_list.refresh_contents()
+                self._refresh_file_list()
 
         self.app.call_from_thread(_finish)
 
+    def _invalidate_deleted(self) -> None:
+        # Even a stopped or failed delete may have removed some objects.
+        if self._invalidate is not None:
+            self._invalidate(self._deleter.uri)
+
+    def _refresh_file_list(self) -> None:
+        # Refresh listing so the deleted objects disappear.
+        if hasattr(self._file_list, "refresh_contents"):
+            self._file_list.refresh_contents()
+
+    def _resolve_file_list(self) -> None:
+        """Look up the file list and its cache; call on the UI thread."""
+        # The file list lives on the screen underneath this one.
+        self._file_list = self.app.screen_stack[0].query_one("#file_list")
+        listing_service = getattr(self._file_list, "listing_service", None)
+        # `ListingService.invalidate` is thread-safe, unlike the widget.
+        self._invalidate = (
+            listing_service.invalidate if listing_service is not None else None
+        )
+
     def before_delete(self, uri: BucketWithPrefix) -> None:
         self.app.call_from_thread(self.label.update, f"Deleting {uri}…")
 
-    def after_delete(self, uri: BucketWithPrefix) -> None:
+    def after_delete(self, result: DeleteResult) -> None:
         def _update() -> None:
             self.progress.advance(1)
-            self.label.update(f"Deleted {uri}")
+            if result.not_found:
+                self._not_found += 1
+                self.label.update(f"Already deleted {result.uri}")
+            elif not result.ok:
+                self._failed += 1
+                self.label.update(f"Failed to delete {result.uri}: {result.error}")
+            else:
+                self.label.update(f"Deleted {result.uri}")
 
         self.app.call_from_thread(_update)
 
+    def _summary(self) -> str:
+        notes = []
+        if self._not_found:
+            notes.append(f"{self._not_found} already deleted")
+        if self._failed:
+            notes.append(f"{self._failed} failed")
+        return f" ({', '.join(notes)})" if notes else ""
+
+    def _question(self) -> str:
+        count_note = ""
+        if not self._deleter.uri.is_blob:
+            count_note = " (this will delete all objects under the prefix)"
+        return f"Proceed deleting gs://{self._deleter.uri}{count_note}"
+
     def compose(self) -> ComposeResult:
         self.label = Label("Ready to delete", id="delete-info")
         self.progress = ProgressBar(total=0)
@@ -136,11 +221,7 @@ class DeleterScreen(Screen[None]):
 
         with Container(id="question"):
             with Center():
-                count_note = ""
-                if not self._deleter.uri.is_blob:
-                    count_note = " (this will delete all objects under the prefix)"
-                q = f"Proceed deleting gs://{self._deleter.uri}{count_note}?"
-                self.question_label = Label(q)
+                self.question_label = Label(Text(f"{self._question()}?"))
                 yield self.question_label
 
             with Horizontal(id="horizontal"):
@@ -169,7 +250,11 @@ class DeleterScreen(Screen[None]):
                 self.query_one("#question").styles.display = "none"
                 self.query_one("#deleter").styles.display = "block"
                 self.state = State.STARTED
+                self.progress.update(total=0, progress=0)
+                self._not_found = 0
+                self._failed = 0
                 self._deleter.stopped = False
+                self._resolve_file_list()
                 self._delete_thread = threading.Thread(
                     target=self.start_delete, daemon=True
                 )
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import struct
+import threading
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+from burf.storage.ds import ColumnarListing
+
+_SCHEMA_VERSION = 3
+
+
+def default_cache_dir() -> str:
+    """Return the per-user cache directory for burf (XDG_CACHE_HOME aware)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "burf")
+
+
+class DiskListingCache:
+    """Listings persisted in a small SQLite database across sessions.
+
+    Each row stores a compressed `ColumnarListing` with its signature and
+    fetch time.
+    Only the `max_entries` most recently fetched listings are kept.
+    """
+
+    def __init__(self, path: str, *, max_entries: int = 500) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @classmethod
+    def in_dir(cls, cache_dir: str, **kwargs: Any) -> DiskListingCache:
+        return cls(os.path.join(cache_dir, "listings.sqlite3"), **kwargs)
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS listings ("
+                    " key TEXT PRIMARY KEY,"
+                    " version INTEGER NOT NULL,"
+                    " fetched_at REAL NOT NULL,"
+                    " signature TEXT NOT NULL,"
+                    " payload BLOB NOT NULL)"
+                )
+            self._initialized = True
+        return conn
+
+    def load(
+        self, key: str
+    ) -> Optional[tuple[ColumnarListing, str, datetime]]:
+        """Return `(elems, signature, fetched_at)` for `key`, or None.
+
+        Unreadable or outdated rows are treated as misses.
+        """
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    row = conn.execute(
+                        "SELECT version, fetched_at, signature, payload"
+                        " FROM listings WHERE key = ?",
+                        (key,),
+                    ).fetchone()
+                finally:
+                    conn.close()
+            if row is None or row[0] != _SCHEMA_VERSION or not isinstance(row[2], str):
+                return None
+            signature = row[2]
+            fetched_at = datetime.fromtimestamp(row[1], tz=timezone.utc)
+            elems = ColumnarListing.from_bytes(zlib.decompress(row[3]))
+            return elems, signature, fetched_at
+        except (sqlite3.Error, OSError, ValueError, struct.error, zlib.error):
+            return None
+
+    def store(
+        self,
+        key: str,
+        elems: ColumnarListing,
+        signature: str,
+        fetched_at: datetime,
+    ) -> None:
+        """Persist a listing; failures are ignored since the cache is best-effort."""
+        try:
+            payload = zlib.compress(elems.to_bytes())
+            with self._lock:
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO listings"
+                            " (key, version, fetched_at, signature, payload)"
+                            " VALUES (?, ?, ?, ?, ?)",
+                            (
+                                key,
+                                _SCHEMA_VERSION,
+                                fetched_at.timestamp(),
+                                signature,
+                                payload,
+                            ),
+                        )
+                        conn.execute(
+                            "DELETE FROM listings WHERE key NOT IN ("
+                            " SELECT key FROM listings"
+                            " ORDER BY fetched_at DESC LIMIT ?)",
+                            (self.max_entries,),
+                        )
+                finally:
+                    conn.close()
+        except (sqlite3.Error, OSError, ValueError, TypeError):
+            return
+
+    def delete(self, keys: Iterable[str] = (), *, prefixes: Iterable[str] = ()) -> None:
+        """Drop the rows stored under `keys` and under keys starting with `prefixes`."""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.executemany(
+                            "DELETE FROM listings WHERE key = ?",
+                            [(key,) for key in keys],
+                        )
+                        conn.executemany(
+                            "DELETE FROM listings WHERE substr(key, 1, ?) = ?",
+                            [(len(prefix), prefix) for prefix in prefixes],
+                        )
+                finally:
+                    conn.close()
+        except (sqlite3.Error, OSError):
+            return
+
+    def clear(self) -> None:
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.execute("DELETE FROM listings")
+                finally:
+                    conn.close()
+        except (sqlite3.Error, OSError):
+            return
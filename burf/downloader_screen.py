@@ -1,15 +1,22 @@
 import os
+import queue
 import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Iterator, List, Optional, Union
 
+from rich.text import Text
 from textual.app import ComposeResult
 from textual.containers import Center, Container, Horizontal, Middle
 from textual.screen import Screen
 from textual.widgets import Button, Footer, Header, Label, ProgressBar
 
+from burf.metrics import THROUGHPUT_BUCKETS, metrics
 from burf.storage.ds import BucketWithPrefix
-from burf.storage.storage import Storage
+from burf.storage.storage import TRANSFER_FIELDS, Storage
+from burf.sync_manifest import SyncManifest
+from burf.util import human_readable_bytes
 
 
 class Downloader:
@@ -20,47 +27,183 @@ class Downloader:
         destination: str,
         call_before_each_object: Callable[[BucketWithPrefix, str], Any],
         call_after_each_object: Callable[[BucketWithPrefix, str], Any],
+        max_workers: int = 8,
+        sync: bool = False,
+        call_on_skip: Optional[Callable[[BucketWithPrefix, str], Any]] = None,
+        call_on_listed: Optional[Callable[[int], Any]] = None,
+        listing_read_ahead: int = 2,
+        listing_workers: int = 8,
     ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
         self.uri = uri
         self.stopped = False
+        self.max_workers = max_workers
+        self.sync = sync
+        self.skipped_count = 0
+        self.skipped_bytes = 0
         self.destination = destination
         self._call_before = call_before_each_object
         self._call_after = call_after_each_object
+        self._call_on_skip = call_on_skip
+        self._call_on_listed = call_on_listed
+        self.listing_read_ahead = max(1, listing_read_ahead)
+        self.listing_workers = max(1, listing_workers)
+        self.listed_count = 0
+        self._skip_lock = threading.Lock()
+        self._manifest: Optional[SyncManifest] = None
         if not uri.is_blob:
             self.destination = os.path.join(
                 self.destination, uri.get_last_part_of_address()
             )
         self._storage = storage
-        self._blobs: Optional[list[BucketWithPrefix]] = None
 
-    def list_blobs(self) -> list[BucketWithPrefix]:
-        if self._blobs is None:
-            self._blobs = self._storage.list_all_blobs(self.uri)
-        return self._blobs
+    def iter_blobs(self) -> Iterator[BucketWithPrefix]:
+        """Yield the blobs to download while the listing is still in progress.
 
-    def number_of_blobs(self) -> int:
-        return len(self.list_blobs())
+        A listing thread runs at most `listing_read_ahead` pages ahead of the
+        consumer, so memory stays bounded however many objects there are.
+        Prefixes are listed over `listing_workers` key ranges at once.
+        `call_on_listed` receives the running total after every page.
+        """
+        pages: queue.Queue[Union[List[BucketWithPrefix], BaseException, None]] = (
+            queue.Queue(maxsize=self.listing_read_ahead)
+        )
+        abandoned = threading.Event()
+
+        def _put(item: Union[List[BucketWithPrefix], BaseException, None]) -> bool:
+            while not abandoned.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def _produce() -> None:
+            try:
+                if self.uri.is_blob or self.listing_workers == 1:
+                    listing = self._storage.list_all_blobs_pages(
+                        self.uri, TRANSFER_FIELDS
+                    )
+                else:
+                    listing = self._storage.list_all_blobs_pages_parallel(
+                        self.uri, TRANSFER_FIELDS, max_workers=self.listing_workers
+                    )
+                for page in listing:
+                    if self.stopped:
+                        break
+                    self.listed_count += len(page)
+                    if self._call_on_listed is not None:
+                        self._call_on_listed(self.listed_count)
+                    if not _put(page):
+                        return
+            except BaseException as e:
+                _put(e)
+                return
+            _put(None)
+
+        self.listed_count = 0
+        threading.Thread(target=_produce, name="burf-list", daemon=True).start()
+        try:
+            while True:
+                item = pages.get()
+                if item is None:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield from item
+        finally:
+            abandoned.set()
 
     def download(self) -> None:
-        blobs = self.list_blobs()
+        """Download every listed blob using a bounded pool of worker threads.
+
+        At most `max_workers` downloads run at once and only a few more are queued,
+        so setting `stopped` takes effect quickly. The first error stops further
+        submissions and is re-raised once in-flight downloads have finished.
+
+        In `sync` mode, objects whose local copy is unchanged (see `SyncManifest`)
+        are skipped and counted in `skipped_count`/`skipped_bytes`.
+        """
+        if self.sync:
+            self._manifest = SyncManifest(self.destination)
+            self._manifest.load()
+        try:
+            self._download_all()
+        finally:
+            if self._manifest is not None:
+                self._manifest.save()
+
+    def _download_all(self) -> None:
+        blobs = self.iter_blobs()
         base_prefix = self.uri.full_prefix if not self.uri.is_blob else ""
-        for blob in blobs:
-            if not self.stopped:
+        slots = threading.BoundedSemaphore(self.max_workers * 2)
+        errors: list[BaseException] = []
+
+        def _release(future: Future[None]) -> None:
+            exc = future.exception() if not future.cancelled() else None
+            if exc is not None:
+                errors.append(exc)
+            slots.release()
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="burf-download"
+        ) as pool:
+            for blob in blobs:
+                slots.acquire()
+                if self.stopped or errors:
+                    slots.release()
+                    break
+
                 if base_prefix and blob.full_prefix.startswith(base_prefix):
                     rel_path = blob.full_prefix[len(base_prefix) :]
                 else:
                     rel_path = blob.get_last_part_of_address()
 
                 destination_path = os.path.join(self.destination, rel_path)
+                pool.submit(
+                    self._download_one, blob, rel_path, destination_path
+                ).add_done_callback(_release)
 
-                destination_dir = os.path.dirname(destination_path)
-                if destination_dir:
-                    os.makedirs(destination_dir, exist_ok=True)
-                self._call_before(blob, destination_path)
-                self._storage.download_to_filename(blob, destination_path)
-                self._call_after(blob, destination_path)
-            else:
-                break
+        if errors:
+            raise errors[0]
+
+    def _download_one(
+        self, blob: BucketWithPrefix, rel_path: str, destination_path: str
+    ) -> None:
+        if self.stopped:
+            return
+        manifest = self._manifest
+        if manifest is not None and manifest.is_unchanged(
+            rel_path, blob, destination_path
+        ):
+            with self._skip_lock:
+                self.skipped_count += 1
+                self.skipped_bytes += blob.size or 0
+            metrics.counter("download.skipped").inc()
+            if self._call_on_skip is not None:
+                self._call_on_skip(blob, destination_path)
+            return
+
+        destination_dir = os.path.dirname(destination_path)
+        if destination_dir:
+            os.makedirs(destination_dir, exist_ok=True)
+        self._call_before(blob, destination_path)
+        started = time.perf_counter()
+        with metrics.timed("download.object"):
+            self._storage.download_to_filename(blob, destination_path)
+        elapsed = time.perf_counter() - started
+        metrics.counter("download.objects").inc()
+        if blob.size:
+            metrics.counter("download.bytes").inc(blob.size)
+            if elapsed > 0:
+                metrics.histogram(
+                    "download.bytes_per_second", THROUGHPUT_BUCKETS
+                ).observe(blob.size / elapsed)
+        if manifest is not None:
+            manifest.record(rel_path, blob, destination_path)
+        self._call_after(blob, destination_path)
 
 
 class State(Enum):
@@ -96,6 +239,7 @@ class DownloaderScreen(Screen[None]):
         download_uri: BucketWithPrefix,
         storage: Storage,
         download_to: str = os.getcwd(),
+        max_workers: int = 8,
         name: str | None = None,
         id: str | None = None,
         classes: str | None = None,
@@ -108,30 +252,49 @@ class DownloaderScreen(Screen[None]):
             self._download_to,
             self.before_download,
             self.after_download,
+            max_workers=max_workers,
+            call_on_skip=self.skip_download,
+            call_on_listed=self.listed,
         )
         self.state = State.STOPPED
         self._download_thread: Optional[threading.Thread] = None
 
     def start_download(self) -> None:
-        total = self._downloader.number_of_blobs()
-
-        def _set_total() -> None:
-            self.progress.total = total
-
-        self.app.call_from_thread(_set_total)
+        try:
+            self._downloader.download()
+        except Exception as e:
+            error = e
+
+            def _fail() -> None:
+                # Error messages may contain brackets; keep them out of markup.
+                self.label.update(
+                    Text(f"Download failed: {error}{self._skipped_summary()}")
+                )
+                self.state = State.STOPPED
+                # Offer to start over.
+                self.question_label.update(Text(f"{self._question()} again?"))
+                self.query_one("#question").styles.display = "block"
+                self.query_one("#sync").styles.display = "block"
 
-        self._downloader.download()
+            self.app.call_from_thread(_fail)
+            return
 
         def _finish() -> None:
             if self._downloader.stopped:
-                self.label.update("Download stopped")
+                self.label.update(f"Download stopped{self._skipped_summary()}")
                 self.state = State.STOPPED
             else:
-                self.label.update("Download finished")
+                self.label.update(f"Download finished{self._skipped_summary()}")
                 self.state = State.FINISHED
 
         self.app.call_from_thread(_finish)
 
+    def listed(self, total: int) -> None:
+        def _set_total() -> None:
+            self.progress.total = total
+
+        self.app.call_from_thread(_set_total)
+
     def before_download(self, uri: BucketWithPrefix, destination: str) -> None:
         self.app.call_from_thread(
             self.label.update, f"Downloading {uri} -> {destination}"
@@ -144,27 +307,46 @@ class DownloaderScreen(Screen[None]):
 
         self.app.call_from_thread(_update)
 
+    def skip_download(self, uri: BucketWithPrefix, destination: str) -> None:
+        def _update() -> None:
+            self.progress.advance(1)
+            self.label.update(f"Unchanged {uri} -> {destination}")
+
+        self.app.call_from_thread(_update)
+
+    def _skipped_summary(self) -> str:
+        if not self._downloader.sync:
+            return ""
+        return (
+            f" ({self._downloader.skipped_count} unchanged objects skipped, "
+            f"{human_readable_bytes(self._downloader.skipped_bytes)} saved)"
+        )
+
+    def _question(self) -> str:
+        return (
+            "Proceed downloading "
+            f"{self._downloader.uri} "
+            "=> "
+            f" {self._downloader.destination}"
+        )
+
     def compose(self) -> ComposeResult:
         self.label = Label("Ready to download", id="download-info")
-        # Avoid blocking UI by listing objects in compose; total is set in the worker thread.
+        # Avoid blocking UI by listing objects in compose; the total grows as the
+        # listing thread advances.
         self.progress = ProgressBar(total=0)
 
         yield Header()
 
         with Container(id="question"):
             with Center():
-                q = (
-                    "Proceed downloading "
-                    f"{self._downloader.uri} "
-                    "=> "
-                    f" {self._downloader.destination}"
-                )
-                self.question_label = Label(q)
+                self.question_label = Label(Text(self._question()))
                 yield self.question_label
 
             with Horizontal(id="horizontal"):
                 with Center():
                     yield Button("Yes", id="yes")
+                    yield Button("Sync", id="sync")
                     yield Button("No", id="no")
 
         with Middle(id="downloader"):
@@ -183,11 +365,14 @@ class DownloaderScreen(Screen[None]):
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if self.state == State.STOPPED:
-            if event.button.id == "yes":
+            if event.button.id in ("yes", "sync"):
                 self.query_one("#question").styles.display = "none"
+                self.query_one("#sync").styles.display = "none"
                 self.query_one("#downloader").styles.display = "block"
                 self.state = State.STARTED
+                self.progress.update(total=0, progress=0)
                 self._downloader.stopped = False
+                self._downloader.sync = event.button.id == "sync"
                 self._download_thread = threading.Thread(
                     target=self.start_download, daemon=True
                 )
@@ -0,0 +1,357 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Callable, Optional, Sequence, Union
+
+from rich.text import Text
+from textual.app import ComposeResult
+from textual.screen import Screen
+from textual.timer import Timer
+from textual.widgets import DataTable, Footer, Header, Label
+
+from burf.storage.ds import BucketWithPrefix
+from burf.storage.sharded_listing import split_remaining_range, spread
+from burf.storage.storage import SIZE_FIELDS, Storage
+from burf.util import LRUCache, human_readable_bytes
+
+# Row key for the objects stored directly in the scanned folder.
+FILES_HERE = ""
+
+
+@dataclass
+class UsageTotals:
+    objects: int = 0
+    total_bytes: int = 0
+
+
+@dataclass(frozen=True)
+class _Shard:
+    uri: BucketWithPrefix
+    start: Optional[str]
+    end: Optional[str]
+    # Row every object of the shard counts towards; None to derive it from names.
+    row: Optional[str] = None
+
+
+_Job = Union[_Shard, Callable[[], None]]
+
+
+@dataclass
+class DiskUsageResult:
+    totals: dict[str, UsageTotals] = field(default_factory=dict)
+    finished_at: Optional[datetime] = None
+    elapsed: float = 0.0
+
+
+class DiskUsageScanner:
+    """Sums object counts and bytes per child of a folder (or per bucket).
+
+    The recursive listing is cut into key ranges: one between each pair of
+    `seeds` (typically the child folders already listed), and any range that
+    turns out to span more than one page is cut again with `split_key_range`.
+    Ranges are listed concurrently on `max_workers` threads and their totals
+    are added up as pages arrive, so `snapshot()` has partial results early.
+    """
+
+    def __init__(
+        self,
+        uri: BucketWithPrefix,
+        storage: Storage,
+        seeds: Sequence[str] = (),
+        *,
+        max_workers: int = 16,
+        max_pending_shards: int = 32,
+        split_ways: int = 8,
+    ) -> None:
+        self.uri = uri
+        self.stopped = False
+        self.error: Optional[BaseException] = None
+        self.finished = threading.Event()
+        self.max_pending_shards = max_pending_shards
+        self.split_ways = split_ways
+        self._storage = storage
+        self._seeds = spread(
+            [seed for seed in seeds if seed.startswith(uri.full_prefix)],
+            max_pending_shards,
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="burf-du"
+        )
+        self._lock = threading.Lock()
+        self._totals: dict[str, UsageTotals] = {}
+        self._pending = 0
+        self._started_at = 0.0
+        self._elapsed = 0.0
+        self._finished_at: Optional[datetime] = None
+
+    def start(self) -> None:
+        self._started_at = time.monotonic()
+        self._submit_many(self._initial_shards_job)
+
+    def stop(self) -> None:
+        self.stopped = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def snapshot(self) -> tuple[DiskUsageResult, int]:
+        """Return the totals so far and the number of ranges still to list."""
+        with self._lock:
+            totals = {row: replace(usage) for row, usage in self._totals.items()}
+            pending = self._pending
+            finished_at = self._finished_at
+            elapsed = (
+                self._elapsed
+                if finished_at is not None
+                else time.monotonic() - self._started_at
+            )
+        return (
+            DiskUsageResult(totals=totals, finished_at=finished_at, elapsed=elapsed),
+            pending,
+        )
+
+    def _submit_many(self, *jobs: _Job) -> None:
+        with self._lock:
+            self._pending += len(jobs)
+        for job in jobs:
+            try:
+                self._executor.submit(self._run, job)
+            except RuntimeError:
+                # The executor was shut down by `stop()`.
+                self._done(1)
+
+    def _done(self, count: int) -> None:
+        with self._lock:
+            self._pending -= count
+            if self._pending == 0:
+                self._elapsed = time.monotonic() - self._started_at
+                self._finished_at = datetime.now()
+                self.finished.set()
+
+    def _run(self, job: _Job) -> None:
+        try:
+            if self.stopped:
+                return
+            if isinstance(job, _Shard):
+                self._scan(job)
+            else:
+                job()
+        except BaseException as e:
+            if self.error is None:
+                self.error = e
+            self.stopped = True
+        finally:
+            self._done(1)
+
+    def _initial_shards_job(self) -> None:
+        if not self.uri.bucket_name:
+            buckets = self._storage.list_buckets()
+            self._submit_many(
+                *(
+                    _Shard(bucket, None, None, row=bucket.bucket_name + "/")
+                    for bucket in buckets
+                )
+            )
+            return
+        bounds: list[Optional[str]] = [None, *self._seeds, None]
+        self._submit_many(
+            *(
+                _Shard(self.uri, start, end)
+                for start, end in zip(bounds, bounds[1:])
+            )
+        )
+
+    def _row_for(self, shard: _Shard, full_prefix: str) -> str:
+        if shard.row is not None:
+            return shard.row
+        rest = full_prefix[len(self.uri.full_prefix) :]
+        slash = rest.find("/")
+        return rest[: slash + 1] if slash >= 0 else FILES_HERE
+
+    def _scan(self, shard: _Shard) -> None:
+        pages = self._storage.list_all_blobs_pages(
+            shard.uri, SIZE_FIELDS, start_offset=shard.start, end_offset=shard.end
+        )
+        first_key: Optional[str] = None
+        for page_number, page in enumerate(pages):
+            if self.stopped:
+                return
+            counted: dict[str, UsageTotals] = {}
+            for blob in page:
+                row = self._row_for(shard, blob.full_prefix)
+                usage = counted.setdefault(row, UsageTotals())
+                usage.objects += 1
+                usage.total_bytes += blob.size or 0
+            with self._lock:
+                for row, usage in counted.items():
+                    total = self._totals.setdefault(row, UsageTotals())
+                    total.objects += usage.objects
+                    total.total_bytes += usage.total_bytes
+                can_split = self._pending < self.max_pending_shards
+
+            if first_key is None and page:
+                first_key = page[0].full_prefix
+            # A second page means the range is big: hand the rest of it to
+            # several narrower shards instead of paging through it alone.
+            if page_number == 0 or not page or first_key is None or not can_split:
+                continue
+            ranges = split_remaining_range(
+                shard.uri.full_prefix,
+                first_key,
+                page[-1].full_prefix,
+                shard.end,
+                self.split_ways,
+            )
+            if len(ranges) == 1:
+                continue
+            self._submit_many(
+                *(replace(shard, start=start, end=end) for start, end in ranges)
+            )
+            return
+
+
+class _Count(int):
+    def __rich__(self) -> Text:
+        return Text(f"{self:,}", justify="right")
+
+
+class _Bytes(int):
+    def __rich__(self) -> Text:
+        return Text(human_readable_bytes(self), justify="right")
+
+
+class DiskUsageScreen(Screen[None]):
+    BINDINGS = [
+        ("escape", "close", "close"),
+        ("r", "rescan", "rescan"),
+    ]
+
+    CSS = """
+        #du-status {
+            padding: 1 1 0 1;
+        }
+        #du-table {
+            height: 1fr;
+        }
+    """
+
+    # Finished scans, so reopening the view for a folder is instant.
+    results_cache: LRUCache[BucketWithPrefix, DiskUsageResult] = LRUCache(max_entries=50)
+
+    def __init__(
+        self,
+        uri: BucketWithPrefix,
+        storage: Storage,
+        seeds: Sequence[str] = (),
+        name: str | None = None,
+        id: str | None = None,
+        classes: str | None = None,
+    ) -> None:
+        super().__init__(name, id, classes)
+        self._uri = uri
+        self._storage = storage
+        self._seeds = list(seeds)
+        self._scanner: Optional[DiskUsageScanner] = None
+        self._timer: Optional[Timer] = None
+        self._shown: dict[str, tuple[int, int]] = {}
+
+    def compose(self) -> ComposeResult:
+        self.status = Label("", id="du-status")
+        self.table: DataTable[object] = DataTable(id="du-table")
+        self.table.cursor_type = "row"
+        yield Header()
+        yield self.status
+        yield self.table
+        yield Footer()
+
+    def on_mount(self) -> None:
+        self.table.add_column("Name", key="name")
+        self.table.add_column("Objects", key="objects")
+        self.table.add_column("Size", key="size")
+        cached = self.results_cache.get(self._uri)
+        if cached is not None:
+            self._show(cached, pending=0)
+        else:
+            self.action_rescan()
+
+    def _location(self) -> str:
+        if not self._uri.bucket_name:
+            return "all buckets"
+        return f"gs://{self._uri}"
+
+    def action_rescan(self) -> None:
+        if self._scanner is not None:
+            self._scanner.stop()
+        self.table.clear()
+        self._shown = {}
+        self._scanner = DiskUsageScanner(self._uri, self._storage, self._seeds)
+        self._scanner.start()
+        if self._timer is None:
+            self._timer = self.set_interval(0.5, self._poll)
+        else:
+            self._timer.resume()
+        self._poll()
+
+    def _poll(self) -> None:
+        scanner = self._scanner
+        if scanner is None:
+            return
+        result, pending = scanner.snapshot()
+        self._show(result, pending, error=scanner.error)
+        if scanner.finished.is_set() and self._timer is not None:
+            self._timer.pause()
+            if scanner.error is None and not scanner.stopped:
+                self.results_cache[self._uri] = result
+
+    def _show(
+        self,
+        result: DiskUsageResult,
+        pending: int,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        changed = False
+        for row, usage in result.totals.items():
+            values = (usage.objects, usage.total_bytes)
+            if self._shown.get(row) == values:
+                continue
+            changed = True
+            if row not in self._shown:
+                label = row if row != FILES_HERE else "(files in this folder)"
+                # Text, so object names are not parsed as Rich markup.
+                self.table.add_row(
+                    Text(label),
+                    _Count(usage.objects),
+                    _Bytes(usage.total_bytes),
+                    key=row,
+                )
+            else:
+                self.table.update_cell(row, "objects", _Count(usage.objects))
+                self.table.update_cell(row, "size", _Bytes(usage.total_bytes))
+            self._shown[row] = values
+        if changed:
+            self.table.sort("size", reverse=True)
+
+        objects = sum(usage.objects for usage in result.totals.values())
+        total_bytes = sum(usage.total_bytes for usage in result.totals.values())
+        summary = (
+            f"{self._location()}: {objects:,} objects, "
+            f"{human_readable_bytes(total_bytes)}"
+        )
+        if error is not None:
+            self.status.update(f"{summary} (incomplete, listing failed: {error})")
+        elif result.finished_at is not None:
+            self.status.update(
+                f"{summary} (computed {result.finished_at:%Y-%m-%d %H:%M:%S} "
+                f"in {result.elapsed:.1f}s, r to rescan)"
+            )
+        else:
+            self.status.update(
+                f"{summary} (scanning, {pending} ranges left, {result.elapsed:.0f}s)"
+            )
+
+    def action_close(self) -> None:
+        self.dismiss()
+
+    def on_unmount(self) -> None:
+        if self._scanner is not None:
+            self._scanner.stop()
@@ -1,3 +1,4 @@
+from rich.text import Text
 from textual.app import ComposeResult
 from textual.containers import Center, Horizontal
 from textual.screen import Screen
@@ -37,7 +38,9 @@ class ErrorScreen(Screen[None]):
         with Center():
             yield Label(self._title)
         with Center():
-            yield Label(self._message, id="message")
+            # Messages quote paths and globs, which may contain brackets;
+            # keep them out of markup.
+            yield Label(Text(self._message), id="message")
         with Center():
             with Horizontal(id="buttons"):
                 yield Button("Close", name="close")
@@ -1,23 +1,35 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import ClassVar, Optional
 
-from google.api_core.exceptions import BadRequest, Forbidden
-from google.auth.exceptions import RefreshError
-from textual.binding import Binding
-from textual.color import Color
-from textual.containers import Horizontal
+from rich.style import Style
+from rich.text import Text
+from textual import events
+from textual.binding import Binding, BindingType
+from textual.geometry import Region, Size
 from textual.message import Message
 from textual.reactive import reactive
-from textual.widgets import Label, ListItem, ListView
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
+from textual.timer import Timer
 
-from burf.storage.ds import BucketWithPrefix
+from burf.disk_cache import DiskListingCache
+from burf.storage.ds import BucketWithPrefix, ColumnarListing
 from burf.storage.storage import Storage
-from burf.listing_service import ListingService
-from burf.util import RecentDict, human_readable_bytes
+from burf.listing_service import ListingDelta, ListingService
+from burf.metrics import metrics
+from burf.search_index import CASE_SENSITIVE_BY_DEFAULT, SearchIndex, SearchQuery
+from burf.string_getter import StringGetter
+from burf.util import LRUCache, human_readable_bytes
 
 
-class FileListView(ListView):
+class FileListView(ScrollView, can_focus=True):
+    """A virtualized listing of buckets, folders and blobs.
+
+    Rows are drawn on demand with the line API, so only the rows inside the
+    viewport are ever built, whatever the size of the listing.
+    """
+
     class AccessForbidden(Message, bubble=True):
         path: str
         file_list_view: FileListView
@@ -44,43 +56,138 @@ class FileListView(ListView):
         def control(self) -> FileListView:
             return self.file_list_view
 
-    BINDINGS = [
+    class InvalidMatchGlob(Message, bubble=True):
+        match_glob: str
+        reason: str
+        file_list_view: FileListView
+
+        def __init__(
+            self, file_list_view: FileListView, match_glob: str, reason: str
+        ) -> None:
+            super().__init__()
+            self.file_list_view = file_list_view
+            self.match_glob = match_glob
+            self.reason = reason
+
+        @property
+        def control(self) -> FileListView:
+            return self.file_list_view
+
+    class SetupFailed(Message, bubble=True):
+        error: BaseException
+        file_list_view: FileListView
+
+        def __init__(self, file_list_view: FileListView, error: BaseException) -> None:
+            super().__init__()
+            self.file_list_view = file_list_view
+            self.error = error
+
+        @property
+        def control(self) -> FileListView:
+            return self.file_list_view
+
+    BINDINGS: ClassVar[list[BindingType]] = [
         Binding("enter", "select_cursor", "Select"),
         Binding("backspace", "back", "Parent"),
         Binding("/", "search", "search"),
+        Binding("f", "filter", "filter"),
+        Binding("n", "next_match", "Next match", show=False),
+        Binding("N", "previous_match", "Previous match", show=False),
+        Binding("up", "cursor_up", "Cursor Up", show=False),
+        Binding("down", "cursor_down", "Cursor Down", show=False),
+        Binding("pageup", "page_up", "Page Up", show=False),
+        Binding("pagedown", "page_down", "Page Down", show=False),
+        Binding("home", "first", "First", show=False),
+        Binding("end", "last", "Last", show=False),
     ]
 
-    showing_elems: reactive[List[BucketWithPrefix]] = reactive([])
-    position_cache: RecentDict[BucketWithPrefix, int] = RecentDict(10)
+    COMPONENT_CLASSES: ClassVar[set[str]] = {
+        "file-list--cursor",
+        "file-list--time",
+        "file-list--size",
+    }
+
+    DEFAULT_CSS = """
+    FileListView {
+        height: 1fr;
+        overflow-x: hidden;
+        background: $panel-lighten-1;
+        color: $text;
+    }
+    FileListView > .file-list--cursor {
+        background: $accent 50%;
+    }
+    FileListView:focus > .file-list--cursor {
+        background: $accent;
+    }
+    FileListView > .file-list--time {
+        background: $panel-lighten-3;
+    }
+    FileListView > .file-list--size {
+        background: $panel-lighten-2;
+    }
+    """
+
+    # Seconds the cursor has to rest before folders around it are prefetched.
+    PREFETCH_DELAY: ClassVar[float] = 0.3
+    # Folders listed ahead of time: the one under the cursor plus this many after it.
+    PREFETCH_SIBLINGS: ClassVar[int] = 3
+    # Rows scanned from the cursor when looking for folders to prefetch.
+    PREFETCH_SCAN_ROWS: ClassVar[int] = 50
+    # Seconds between checks for a storage backend that is still being set up.
+    STORAGE_POLL_INTERVAL: ClassVar[float] = 0.05
+
+    index: reactive[Optional[int]] = reactive[Optional[int]](0)
+    showing_elems: reactive[ColumnarListing] = reactive(ColumnarListing)
+    position_cache: LRUCache[BucketWithPrefix, int] = LRUCache(max_entries=100)
 
     def __init__(
         self,
         storage: Storage,
         uri: BucketWithPrefix = BucketWithPrefix("", []),
-        *children: ListItem,
-        initial_index: int | None = 0,
         name: str | None = None,
         id: str | None = None,
         classes: str | None = None,
         disabled: bool = False,
+        disk_cache: Optional[DiskListingCache] = None,
     ) -> None:
-        super().__init__(
-            *children,
-            initial_index=initial_index,
-            name=name,
-            id=id,
-            classes=classes,
-            disabled=disabled,
-        )
+        super().__init__(name=name, id=id, classes=classes, disabled=disabled)
 
         self._storage = storage
-        self._listing_service = ListingService(storage)
+        self._listing_service = ListingService(storage, disk_cache=disk_cache)
         self._uri = uri
+        # Glob the listing is filtered with on the server, relative to `uri`.
+        self._match_glob: Optional[str] = None
         self._refresh_token = 0
+        self._pending_index: int | None = None
+        self._applying_delta = False
+        self._search_index: Optional[SearchIndex] = None
+        self._search_index_source: Optional[ColumnarListing] = None
+        self._last_search: Optional[SearchQuery] = None
+        self._prefetch_timer: Optional[Timer] = None
 
     def on_mount(self) -> None:
+        self._refresh_when_ready()
+
+    def _refresh_when_ready(self) -> None:
+        """Show the first listing once the storage backend is set up."""
+        if not self.storage.ready:
+            self.app.set_loading(True)
+            self.set_timer(self.STORAGE_POLL_INTERVAL, self._refresh_when_ready)
+            return
+        error = self.storage.setup_error
+        if error is not None:
+            self.app.set_loading(False)
+            if not self._report_error(error, "gs://" + str(self.uri)):
+                # Nothing can be listed without a backend.
+                self.app.post_message(self.SetupFailed(self, error))
+            return
         self.refresh_contents()
 
+    @property
+    def listing_service(self) -> ListingService:
+        return self._listing_service
+
     @property
     def storage(self) -> Storage:
         return self._storage
@@ -93,87 +200,214 @@ class FileListView(ListView):
     def uri(self, new_uri: BucketWithPrefix) -> None:
         self.position_cache[self.uri] = self.index or 0
         self._uri = new_uri
+        self._match_glob = None
+
+    @property
+    def match_glob(self) -> Optional[str]:
+        return self._match_glob
+
+    def set_match_glob(self, pattern: Optional[str]) -> None:
+        """Filter the listing with `pattern` on the server; empty or None clears it.
+
+        `pattern` is a GCS match glob relative to the current folder, e.g.
+        `*.parquet`.
+        """
+        pattern = pattern or None
+        if pattern == self._match_glob:
+            return
+        self._match_glob = pattern
+        self.refresh_contents()
+
+    def action_filter(self) -> None:
+        if not self.uri.bucket_name:
+            return
+        self.app.push_screen(
+            StringGetter(place_holder="glob, e.g. *.parquet (empty to clear)"),
+            self._on_filter_entered,
+        )
+
+    def _on_filter_entered(self, pattern: Optional[str]) -> None:
+        if pattern is not None:
+            self.set_match_glob(pattern.strip())
 
     def watch_showing_elems(
-        self, _: List[BucketWithPrefix], new_showing_elems: List[BucketWithPrefix]
+        self, _: ColumnarListing, new_showing_elems: ColumnarListing
     ) -> None:
-        self.clear()
-        self.index = 0
+        if self._applying_delta:
+            return
+        with metrics.timed("ui.show_listing"):
+            self._update_virtual_size()
+            self.index = self.position_cache.get(self.uri, 0)
+            # The index may not have changed, so its watcher would not fire.
+            self._schedule_prefetch()
+            self.scroll_to(y=0, animate=False)
+            self._scroll_cursor_into_view()
+            self.refresh()
+
+    def _update_virtual_size(self) -> None:
+        self.virtual_size = Size(
+            self.scrollable_content_region.width, len(self.showing_elems)
+        )
+
+    def on_resize(self, _: events.Resize) -> None:
+        self._update_virtual_size()
+        self._scroll_cursor_into_view()
+
+    def validate_index(self, index: Optional[int]) -> Optional[int]:
+        if not self.showing_elems or index is None:
+            return None
+        return max(0, min(index, len(self.showing_elems) - 1))
+
+    def watch_index(self, old_index: Optional[int], new_index: Optional[int]) -> None:
+        for row in (old_index, new_index):
+            if row is not None:
+                self._refresh_row(row)
+        self._scroll_cursor_into_view()
+        self._schedule_prefetch()
+
+    def _schedule_prefetch(self) -> None:
+        if self._prefetch_timer is not None:
+            self._prefetch_timer.stop()
+        self._prefetch_timer = self.set_timer(
+            self.PREFETCH_DELAY, self._prefetch_around_cursor
+        )
 
+    def _prefetch_around_cursor(self) -> None:
+        """List the folder under the cursor and the next few ones into the cache."""
+        self._prefetch_timer = None
+        if self.index is None:
+            return
+        targets: list[BucketWithPrefix] = []
+        end = min(len(self.showing_elems), self.index + self.PREFETCH_SCAN_ROWS)
+        for row in range(self.index, end):
+            if self.showing_elems.is_blob(row):
+                continue
+            targets.append(self._child_uri(self.showing_elems[row]))
+            if len(targets) > self.PREFETCH_SIBLINGS:
+                break
+        if targets:
+            self._listing_service.prefetch(targets)
+
+    def _refresh_row(self, row: int) -> None:
+        y = row - self.scroll_offset.y
+        region = self.scrollable_content_region
+        if 0 <= y < region.height:
+            self.refresh(Region(0, y, region.width, 1))
+
+    def _scroll_cursor_into_view(self) -> None:
+        if self.index is None:
+            return
+        top = self.scroll_offset.y
+        height = self.scrollable_content_region.height
+        if height <= 0:
+            return
+        if self.index < top:
+            self.scroll_to(y=self.index, animate=False)
+        elif self.index >= top + height:
+            self.scroll_to(y=self.index - height + 1, animate=False)
+
+    def _display_name(self, showing_elem: BucketWithPrefix) -> str:
+        if showing_elem.is_bucket:
+            return f"📦 {showing_elem.bucket_name}"
+
+        display_name = showing_elem.full_prefix
         base_prefix = self.uri.full_prefix if self.uri.bucket_name != "" else ""
+        if base_prefix and display_name.startswith(base_prefix):
+            display_name = display_name[len(base_prefix) :]
+        if not showing_elem.is_blob:
+            return f"📂 {display_name}"
+        return f"📒 {display_name}"
+
+    def render_line(self, y: int) -> Strip:
+        row = self.scroll_offset.y + y
+        width = self.scrollable_content_region.width
+        if row >= len(self.showing_elems) or width <= 0:
+            return Strip.blank(width, self.rich_style)
+
+        showing_elem = self.showing_elems[row]
+        base_style = self.rich_style
+        if row == self.index:
+            base_style += self.get_component_rich_style("file-list--cursor")
+
+        columns: list[tuple[str, int, Style]] = []
+        if showing_elem.is_blob:
+            name_width = width * 65 // 100
+            time_width = width * 25 // 100
+            size_width = width - name_width - time_width
+            updated_at = showing_elem.updated_at
+            size = showing_elem.size
+            time_style = size_style = base_style
+            if row != self.index:
+                time_style += self.get_component_rich_style("file-list--time")
+                size_style += self.get_component_rich_style("file-list--size")
+            columns = [
+                (self._display_name(showing_elem), name_width, base_style),
+                (
+                    updated_at.strftime("%Y-%m-%d %H:%M:%S.%f")
+                    if updated_at is not None
+                    else "",
+                    time_width,
+                    time_style,
+                ),
+                (
+                    human_readable_bytes(size) if size is not None else "",
+                    size_width,
+                    size_style,
+                ),
+            ]
+        else:
+            columns = [(self._display_name(showing_elem), width, base_style)]
 
-        for showing_elem in new_showing_elems:
-            row = []
-            if showing_elem.is_bucket:
-                display_name = showing_elem.bucket_name
-                pretty_name = Label(f"📦 {display_name}")
-            elif not showing_elem.is_blob:
-                display_name = showing_elem.full_prefix
-                if base_prefix and display_name.startswith(base_prefix):
-                    display_name = display_name[len(base_prefix) :]
-                pretty_name = Label(f"📂 {display_name}")
-            else:
-                display_name = showing_elem.full_prefix
-                if base_prefix and display_name.startswith(base_prefix):
-                    display_name = display_name[len(base_prefix) :]
-                pretty_name = Label(f"📒 {display_name}")
-
-            row.append(pretty_name)
-            if showing_elem.is_blob:
-                pretty_name.styles.width = "65%"
-                bg_color = self.background_colors[0]
-
-                if showing_elem.updated_at is not None:
-                    time_label = Label(
-                        showing_elem.updated_at.strftime("%Y-%m-%d %H:%M:%S.%f")
-                    )
-                else:
-                    time_label = Label("")
-                time_label.styles.width = "25%"
-                time_label.styles.background = Color.lighten(bg_color, 0.2)
-
-                if showing_elem.size is not None:
-                    size_label = Label(human_readable_bytes(showing_elem.size))
-                else:
-                    size_label = Label("")
-                size_label.styles.width = "10%"
-                size_label.styles.background = Color.lighten(bg_color, 0.1)
-
-                row.append(time_label)
-                row.append(size_label)
-
-            self.append(
-                ListItem(
-                    Horizontal(
-                        *row,
-                    ),
-                    name=showing_elem.bucket_name
-                    if showing_elem.is_bucket
-                    else showing_elem.full_prefix,
-                )
-            )
+        segments = []
+        for content, column_width, style in columns:
+            text = Text(content, style=style, no_wrap=True, end="")
+            text.truncate(column_width, overflow="ellipsis", pad=True)
+            segments.extend(text.render(self.app.console))
+        return Strip(segments, width)
+
+    def action_cursor_up(self) -> None:
+        if self.index is not None:
+            self.index -= 1
+
+    def action_cursor_down(self) -> None:
+        if self.index is not None:
+            self.index += 1
+
+    def action_page_up(self) -> None:
+        if self.index is not None:
+            self.index -= max(1, self.scrollable_content_region.height)
 
-        if self.uri in self.position_cache:
-            self.index = self.position_cache[self.uri]
+    def action_page_down(self) -> None:
+        if self.index is not None:
+            self.index += max(1, self.scrollable_content_region.height)
+
+    def action_first(self) -> None:
+        self.index = 0
+
+    def action_last(self) -> None:
+        self.index = len(self.showing_elems) - 1
+
+    def on_click(self, event: events.Click) -> None:
+        row = self.scroll_offset.y + event.y
+        if 0 <= row < len(self.showing_elems):
+            self.index = row
+            self.action_select_cursor()
 
     def action_back(self) -> None:
         self.uri = self.uri.parent()
         self.refresh_contents()
 
-    def on_list_view_selected(self, selected: ListView.Selected) -> None:
-        selected_name = selected.item.name or ""
-        if not selected_name:
-            return
+    def _child_uri(self, elem: BucketWithPrefix) -> BucketWithPrefix:
+        if elem.is_bucket:
+            return BucketWithPrefix(elem.bucket_name, [])
+        return BucketWithPrefix.from_full_prefix(self.uri.bucket_name, elem.full_prefix)
 
-        if self.uri.bucket_name != "" and selected_name[-1] != "/":
+    def action_select_cursor(self) -> None:
+        selected = self.get_selected_uri()
+        if selected is None or selected.is_blob:
             return
-        elif self.uri.bucket_name == "":
-            self.uri = BucketWithPrefix(selected_name, [])
-        else:
-            self.uri = BucketWithPrefix.from_full_prefix(
-                self.uri.bucket_name, selected_name
-            )
 
+        self.uri = self._child_uri(selected)
         self.refresh_contents()
 
     def _apply_refreshed_listing(
@@ -181,24 +415,115 @@ class FileListView(ListView):
         *,
         uri_snapshot: BucketWithPrefix,
         token: int,
-        elems: List[BucketWithPrefix],
+        elems: ColumnarListing,
+        delta: Optional[ListingDelta],
         path: str,
     ) -> None:
         if token != self._refresh_token or self.uri != uri_snapshot:
             return
-        self.showing_elems = elems
+        if delta is not None and delta.old_length == len(self.showing_elems):
+            self._apply_delta(elems, delta)
+        else:
+            self.showing_elems = elems
         self.app.title = path
         self.app.set_loading(False)
 
+    def _apply_delta(
+        self, elems: ColumnarListing, delta: ListingDelta
+    ) -> None:
+        """Swap in a refreshed listing, repainting only the rows that changed.
+
+        The cursor and the top of the viewport stay on the same entries.
+        """
+        with metrics.timed("ui.apply_delta"):
+            self._swap_in_delta(elems, delta)
+
+    def _swap_in_delta(self, elems: ColumnarListing, delta: ListingDelta) -> None:
+        old_top = self.scroll_offset.y
+        old_index = self.index
+        height = self.scrollable_content_region.height
+
+        self._applying_delta = True
+        try:
+            self.showing_elems = elems
+        finally:
+            self._applying_delta = False
+        self._update_virtual_size()
+
+        new_top = delta.map_index(old_top)
+        if new_top != old_top:
+            self.scroll_to(y=new_top, animate=False)
+        if old_index is not None:
+            self.index = delta.map_index(old_index)
+        else:
+            self.index = 0
+
+        rows_shifted = any(
+            old_top <= row < old_top + height for row in delta.removed
+        ) or any(new_top <= row < new_top + height for row in delta.added)
+        if rows_shifted:
+            self.refresh()
+        else:
+            for row in delta.modified:
+                self._refresh_row(row)
+
+    def _append_listing_page(
+        self,
+        *,
+        uri_snapshot: BucketWithPrefix,
+        token: int,
+        page: ColumnarListing,
+        first: bool,
+        path: str,
+    ) -> None:
+        if token != self._refresh_token or self.uri != uri_snapshot:
+            return
+        if first:
+            # Render the first page right away; the watcher resets the list.
+            # Copy, since later pages are appended to it in place.
+            self.showing_elems = page.copy()
+            self.app.title = path
+            self.app.set_loading(False)
+            # The remembered cursor may point past the first page.
+            cached_index = self.position_cache.get(self.uri)
+            if cached_index is not None and cached_index >= len(page):
+                self._pending_index = cached_index
+            return
+
+        with metrics.timed("ui.append_page"):
+            first_new_row = len(self.showing_elems)
+            self.showing_elems.extend(page)
+            self._update_virtual_size()
+            for row in range(first_new_row, len(self.showing_elems)):
+                self._refresh_row(row)
+
+        if self._pending_index is not None and self._pending_index < len(
+            self.showing_elems
+        ):
+            self.index = self._pending_index
+            self._pending_index = None
+
     def _handle_background_error(
         self, *, uri_snapshot: BucketWithPrefix, token: int, exc: BaseException, path: str
     ) -> None:
         if token != self._refresh_token or self.uri != uri_snapshot:
             return
         self.app.set_loading(False)
-        if isinstance(exc, Forbidden) or isinstance(exc, RefreshError):
+        # For other background errors, keep existing contents (best-effort).
+        self._report_error(exc, path)
+
+    def _report_error(self, exc: BaseException, path: str) -> bool:
+        """Post a message for the errors the app explains; False for the rest."""
+        try:
+            # Imported here: google's exception modules are slow to load at startup.
+            from google.api_core.exceptions import BadRequest, Forbidden
+            from google.auth.exceptions import DefaultCredentialsError, RefreshError
+        except ImportError:
+            return False
+
+        if isinstance(exc, (Forbidden, RefreshError, DefaultCredentialsError)):
             self.app.post_message(self.AccessForbidden(self, path))
-            return
+            return True
         if isinstance(exc, BadRequest):
             errors = getattr(exc, "errors", None) or []
             for error in errors:
@@ -207,32 +532,48 @@ class FileListView(ListView):
                     message = str(error.get("message", ""))
                 if "Invalid project" in message:
                     self.app.post_message(self.InvalidProject(self, self.storage.get_project()))
-                    return
-        # For other background errors, keep existing contents (best-effort).
+                    return True
+            if self._match_glob is not None:
+                # Most likely the glob itself; list the folder unfiltered again
+                # rather than leave an empty list that looks filtered.
+                match_glob = self._match_glob
+                self.set_match_glob(None)
+                self.app.post_message(
+                    self.InvalidMatchGlob(
+                        self, match_glob, getattr(exc, "message", None) or str(exc)
+                    )
+                )
+                return True
+        return False
 
     def refresh_contents(self) -> bool:
         self._refresh_token += 1
+        self._pending_index = None
         token = self._refresh_token
 
         uri_snapshot = self.uri
+        match_glob = self._match_glob
 
         if not uri_snapshot.bucket_name:
             path = f"list of buckets in project: ({self.storage.get_project()})"
         else:
             path = "gs://" + str(uri_snapshot)
+            if match_glob is not None:
+                path += f" (filter: {match_glob})"
 
-        cached = self._listing_service.get_cached(uri_snapshot)
+        cached = self._listing_service.get_cached(uri_snapshot, match_glob=match_glob)
         if cached is not None:
             self.showing_elems = cached
             self.app.title = path
             self.app.set_loading(False)
             self._listing_service.refresh_async(
                 uri_snapshot,
-                on_success=lambda elems: self.app.call_from_thread(
+                on_success=lambda elems, delta: self.app.call_from_thread(
                     self._apply_refreshed_listing,
                     uri_snapshot=uri_snapshot,
                     token=token,
                     elems=elems,
+                    delta=delta,
                     path=path,
                 ),
                 on_error=lambda exc: self.app.call_from_thread(
@@ -242,20 +583,45 @@ class FileListView(ListView):
                     exc=exc,
                     path=path,
                 ),
+                match_glob=match_glob,
             )
             return True
 
-        self.showing_elems = []
+        self.showing_elems = ColumnarListing()
         self.app.title = path
         self.app.set_loading(True)
 
+        pages_seen = 0
+
+        def _on_page(page: ColumnarListing) -> None:
+            nonlocal pages_seen
+            pages_seen += 1
+            self.app.call_from_thread(
+                self._append_listing_page,
+                uri_snapshot=uri_snapshot,
+                token=token,
+                page=page,
+                first=pages_seen == 1,
+                path=path,
+            )
+
         self._listing_service.refresh_async(
             uri_snapshot,
-            on_success=lambda elems: self.app.call_from_thread(
+            on_success=lambda elems, delta: self.app.call_from_thread(
                 self._apply_refreshed_listing,
                 uri_snapshot=uri_snapshot,
                 token=token,
                 elems=elems,
+                delta=delta,
+                path=path,
+            ),
+            on_page=_on_page,
+            on_restored=lambda elems: self.app.call_from_thread(
+                self._apply_refreshed_listing,
+                uri_snapshot=uri_snapshot,
+                token=token,
+                elems=elems,
+                delta=None,
                 path=path,
             ),
             on_error=lambda exc: self.app.call_from_thread(
@@ -265,30 +631,96 @@ class FileListView(ListView):
                 exc=exc,
                 path=path,
             ),
+            match_glob=match_glob,
         )
         return True
 
-    def clear_cache(self) -> None:
-        self._listing_service.clear()
-        self._refresh_token += 1
-        self.app.set_loading(False)
-
     def action_search(self) -> None:
         self.app.query_one("#search_box").focus()
 
-    def search_and_highlight(self, value: str) -> None:
+    def _get_search_index(self) -> SearchIndex:
+        """Return the name index for the rows on screen.
+
+        Prefer the one `ListingService` built when the listing arrived; fall back
+        to indexing `showing_elems` (e.g. while pages are still streaming in).
+        """
+        index = self._listing_service.get_search_index(
+            self.uri, self.showing_elems, match_glob=self._match_glob
+        )
+        if index is not None:
+            return index
+        if (
+            self._search_index is None
+            or self._search_index_source is not self.showing_elems
+            or len(self._search_index) != len(self.showing_elems)
+        ):
+            self._search_index = SearchIndex.for_listing(self.uri, self.showing_elems)
+            self._search_index_source = self.showing_elems
+        return self._search_index
+
+    def search_and_highlight(
+        self,
+        value: str,
+        *,
+        backward: bool = False,
+        include_current: bool = False,
+        case_sensitive: bool = CASE_SENSITIVE_BY_DEFAULT,
+        fuzzy: bool = False,
+    ) -> bool:
+        """Move the cursor to the next (or previous) row whose name matches.
+
+        With `include_current` the cursor row itself may match, which keeps the
+        cursor in place while a query is refined character by character. The
+        query and its options are remembered for n/N.
+        """
+        if not value:
+            return False
+        self._last_search = SearchQuery(value, case_sensitive, fuzzy)
+        return self._search(
+            self._last_search, backward=backward, include_current=include_current
+        )
+
+    def _search(
+        self, query: SearchQuery, *, backward: bool, include_current: bool
+    ) -> bool:
+        count = len(self.showing_elems)
+        if count == 0:
+            return False
         index = self.index or 0
-        items_after_selected = list(self.children[index + 1 :])
-        items_til_selected = list(self.children[: index + 1])
+        if not include_current:
+            index = index - 1 if backward else index + 1
+        row = self._get_search_index().find(
+            query.text,
+            index % count,
+            backward=backward,
+            case_sensitive=query.case_sensitive,
+            fuzzy=query.fuzzy,
+        )
+        if row is None:
+            return False
+        self.index = row
+        return True
+
+    def action_next_match(self) -> None:
+        if self._last_search is not None:
+            self._search(self._last_search, backward=False, include_current=False)
 
-        for i, child in enumerate(items_after_selected + items_til_selected):
-            if child.name and value in child.name:
-                self.index = (i + index + 1) % len(self.children)
-                return
+    def action_previous_match(self) -> None:
+        if self._last_search is not None:
+            self._search(self._last_search, backward=True, include_current=False)
 
     def get_current_uri(self) -> BucketWithPrefix:
         return self.uri
 
+    def get_child_folder_prefixes(self) -> list[str]:
+        """Return the full prefixes of the folders shown in the list."""
+        listing = self.showing_elems
+        return [
+            path[path.index("/") + 1 :]
+            for row, path in enumerate(listing.paths())
+            if not listing.is_blob(row)
+        ]
+
     def get_selected_uri(self) -> Optional[BucketWithPrefix]:
         index = self.index
         if index is None:
@@ -1,64 +1,358 @@
 from __future__ import annotations
 
+import bisect
+import hashlib
 import threading
-from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Callable, Optional
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional, Sequence
 
-from burf.storage.ds import BucketWithPrefix
+from burf.disk_cache import DiskListingCache
+from burf.metrics import COUNT_BUCKETS, metrics
+from burf.search_index import SearchIndex
+from burf.storage.ds import BucketWithPrefix, ColumnarListing
 from burf.storage.storage import Storage
-from burf.util import RecentDict
+from burf.util import CacheStats, LRUCache
 
 
-Listing = list[BucketWithPrefix]
-OnSuccess = Callable[[Listing], None]
+Listing = ColumnarListing
+OnPage = Callable[[Listing], None]
 OnError = Callable[[BaseException], None]
+# Hex digest from `ListingDigest`.
+Signature = str
 
 
-def _listing_signature(elems: Listing) -> tuple[tuple[str, bool, int | None, str | None], ...]:
-    """Build a signature that detects listing changes.
+class ListingKey(NamedTuple):
+    """What a listing is cached under: a folder and the match glob applied to it."""
 
-    `BucketWithPrefix.__eq__` intentionally ignores metadata like size/updated_at.
-    For refresh-diffing we include that metadata so UI updates when it changes.
+    uri: BucketWithPrefix
+    match_glob: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ListingDelta:
+    """Row changes that turn a previously shown listing into a refreshed one.
+
+    `removed` holds sorted indices into the old listing; `added` and `modified`
+    hold sorted indices into the new one. Entries are matched by identity
+    (`BucketWithPrefix.__eq__`), and `modified` ones differ only in metadata,
+    as compared by the fingerprints that `ListingDigest` hashes.
     """
-    sig: list[tuple[str, bool, int | None, str | None]] = []
-    for e in elems:
-        updated = e.updated_at
-        updated_s = (
-            updated.astimezone(timezone.utc).isoformat() if updated is not None else None
-        )
-        sig.append((e.full_path, e.is_blob, e.size, updated_s))
-    return tuple(sig)
+
+    old_length: int
+    removed: tuple[int, ...]
+    added: tuple[int, ...]
+    modified: tuple[int, ...]
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.removed or self.added or self.modified)
+
+    def map_index(self, old_index: int) -> int:
+        """Map a row of the old listing to the row now showing the same entry.
+
+        A removed row maps to whatever entry took its place.
+        """
+        kept_before = old_index - bisect.bisect_left(self.removed, old_index)
+        new_index = kept_before
+        for added in self.added:
+            if added > new_index:
+                break
+            new_index += 1
+        return new_index
+
+
+def diff_listings(old: Listing, new: Listing) -> ListingDelta:
+    old_paths = old.paths()
+    old_positions = dict(zip(old_paths, range(len(old_paths))))
+    added: list[int] = []
+    modified: list[int] = []
+    kept = bytearray(len(old_paths))
+    for i, path in enumerate(new.paths()):
+        old_index = old_positions.get(path)
+        if old_index is None:
+            added.append(i)
+            continue
+        kept[old_index] = 1
+        if old.metadata(old_index) != new.metadata(i):
+            modified.append(i)
+    removed = tuple(i for i, was_kept in enumerate(kept) if not was_kept)
+    return ListingDelta(
+        old_length=len(old),
+        removed=removed,
+        added=tuple(added),
+        modified=tuple(modified),
+    )
+
+
+OnSuccess = Callable[[Listing, Optional[ListingDelta]], None]
+
+_SHARED_EXECUTOR_WORKERS = 4
+_PREFETCH_EXECUTOR_WORKERS = 2
+_executors: dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _named_executor(name: str, max_workers: int) -> ThreadPoolExecutor:
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=name
+            )
+            _executors[name] = executor
+        return executor
+
+
+def shared_executor() -> ThreadPoolExecutor:
+    """Return the process-wide pool that runs listing requests."""
+    return _named_executor("burf-listing", _SHARED_EXECUTOR_WORKERS)
+
+
+def shared_prefetch_executor() -> ThreadPoolExecutor:
+    """Return the small process-wide pool that runs speculative listings.
+
+    It is separate from `shared_executor()` so prefetches never queue ahead of
+    a listing the user is waiting for.
+    """
+    return _named_executor("burf-prefetch", _PREFETCH_EXECUTOR_WORKERS)
+
+
+class ListingDigest:
+    """Rolling digest of a listing, fed page by page while it is fetched.
+
+    Each column of `ColumnarListing` goes into its own running hash, so the
+    result does not depend on where the pages were split. Two listings with the
+    same digest hold the same entries with the same metadata, in the same order.
+    """
+
+    def __init__(self) -> None:
+        self._hashes: list[Any] = []
+
+    def update(self, page: Listing) -> None:
+        buffers = page.column_buffers()
+        if not self._hashes:
+            self._hashes = [hashlib.blake2b(digest_size=16) for _ in buffers]
+        for column_hash, buffer in zip(self._hashes, buffers):
+            column_hash.update(buffer)
+
+    def hexdigest(self) -> Signature:
+        combined = hashlib.blake2b(digest_size=16)
+        for column_hash in self._hashes:
+            combined.update(column_hash.digest())
+        return combined.hexdigest()
+
+
+def _estimate_entry_bytes(entry: ListingCacheEntry) -> int:
+    # The search index holds every name twice (exact and casefolded) plus two
+    # offset arrays, which comes to roughly twice the columns again.
+    return 3 * entry.elems.nbytes
 
 
 @dataclass(frozen=True)
 class ListingCacheEntry:
     elems: Listing
-    signature: tuple[tuple[str, bool, int | None, str | None], ...]
+    signature: Signature
     fetched_at: datetime
+    # Built lazily for listings restored from the disk cache.
+    search_index: Optional[SearchIndex]
+
+
+@dataclass
+class _Subscriber:
+    on_success: OnSuccess
+    on_error: Optional[OnError]
+    on_page: Optional[OnPage]
+    on_restored: Optional[OnPage]
+    # The listing the caller already shows and its signature; None if nothing cached.
+    baseline: Optional[ListingCacheEntry]
+    pages_delivered: int = 0
+
+
+@dataclass
+class _InFlight:
+    epoch: int
+    subscribers: list[_Subscriber] = field(default_factory=list)
+    pages: list[Listing] = field(default_factory=list)
+    started: bool = False
+    future: Optional[Future[None]] = None
+    # Started by `prefetch()` rather than by a caller waiting for the result.
+    prefetch: bool = False
+    # Set by `invalidate()`; the result is then not cached.
+    invalidated: bool = False
 
 
 class ListingService:
-    def __init__(self, storage: Storage, *, cache_size: int = 25) -> None:
+    def __init__(
+        self,
+        storage: Storage,
+        *,
+        cache_bytes: int = 512 * 1024 * 1024,
+        cache_ttl: Optional[timedelta] = None,
+        executor: Optional[Executor] = None,
+        disk_cache: Optional[DiskListingCache] = None,
+        prefetch_executor: Optional[Executor] = None,
+        max_pending_prefetches: int = 4,
+        max_prefetch_pages: int = 5,
+        prefetch_fresh_for: timedelta = timedelta(seconds=60),
+    ) -> None:
         self._storage = storage
-        self._cache: RecentDict[BucketWithPrefix, ListingCacheEntry] = RecentDict(cache_size)
+        self._disk_cache = disk_cache
+        self._cache: LRUCache[ListingKey, ListingCacheEntry] = LRUCache(
+            max_bytes=cache_bytes,
+            ttl=cache_ttl.total_seconds() if cache_ttl is not None else None,
+            sizeof=_estimate_entry_bytes,
+        )
+        self._executor = executor if executor is not None else shared_executor()
+        self._prefetch_executor = (
+            prefetch_executor
+            if prefetch_executor is not None
+            else shared_prefetch_executor()
+        )
+        self._max_pending_prefetches = max_pending_prefetches
+        self._max_prefetch_pages = max_prefetch_pages
+        self._prefetch_fresh_for = prefetch_fresh_for
         self._lock = threading.Lock()
-        self._generation: dict[BucketWithPrefix, int] = {}
+        self._in_flight: dict[ListingKey, _InFlight] = {}
+        # Bumped by `clear()` so requests started earlier do not repopulate the cache.
+        self._epoch = 0
 
     def clear(self) -> None:
-        self._cache.clear()
+        """Forget every listing held in memory; the disk cache is left alone."""
+        with self._lock:
+            self._cache.clear()
+            self._in_flight.clear()
+            self._epoch += 1
+
+    def invalidate(self, uri: BucketWithPrefix) -> None:
+        """Forget the cached listings that `uri` (a deleted blob or folder) was in.
+
+        That is the folders it sits in, up to its bucket, and for a folder
+        every listing under it, in memory and on disk. Requests for them that
+        are still running will not cache their result.
+        """
+        ancestors = []
+        parent = uri.parent()
+        while parent.bucket_name:
+            ancestors.append(parent.full_path)
+            parent = parent.parent()
+        under = None if uri.is_blob else uri.full_path
+
+        def _affected(key: ListingKey) -> bool:
+            path = key.uri.full_path
+            return path in ancestors or (under is not None and path.startswith(under))
+
+        with self._lock:
+            for key in self._cache.keys():
+                if _affected(key):
+                    self._cache.pop(key)
+            for key, job in list(self._in_flight.items()):
+                if _affected(key):
+                    job.invalidated = True
+                    del self._in_flight[key]
+        if self._disk_cache is not None:
+            self._disk_cache.delete(
+                ancestors,
+                prefixes=[f"{path}?glob=" for path in ancestors]
+                + ([under] if under is not None else []),
+            )
+
+    def _disk_key(self, key: ListingKey) -> str:
+        if not key.uri.bucket_name:
+            # The bucket list depends on the project rather than on the path.
+            return f"project:{self._storage.get_project()}"
+        if key.match_glob is not None:
+            return f"{key.uri.full_path}?glob={key.match_glob}"
+        return key.uri.full_path
+
+    def _load_from_disk(
+        self, key: ListingKey, job: _InFlight
+    ) -> Optional[ListingCacheEntry]:
+        if self._disk_cache is None:
+            return None
+        loaded = self._disk_cache.load(self._disk_key(key))
+        if loaded is None:
+            return None
+        elems, signature, fetched_at = loaded
+        entry = ListingCacheEntry(
+            elems=elems,
+            signature=signature,
+            fetched_at=fetched_at,
+            search_index=None,
+        )
         with self._lock:
-            self._generation.clear()
+            # A fresh listing may have landed while we were reading from disk.
+            current = self._cache.peek(key)
+            if current is not None:
+                return current
+            if job.epoch == self._epoch and not job.invalidated:
+                self._cache[key] = entry
+        return entry
+
+    @property
+    def cache_stats(self) -> CacheStats:
+        return self._cache.stats
+
+    def get_cached(
+        self, uri: BucketWithPrefix, *, match_glob: Optional[str] = None
+    ) -> Optional[Listing]:
+        """Return the listing for `uri` cached in memory, if any.
+
+        Listings filtered with a `match_glob` are cached apart from the full one.
+        The disk cache is not consulted here, so this never blocks; see the
+        `on_restored` callback of `refresh_async`.
+        """
+        key = ListingKey(uri, match_glob)
+        entry = self._cache.get(key)
+        if entry is not None:
+            metrics.counter("listing.cache.hits").inc()
+            return entry.elems
+        metrics.counter("listing.cache.misses").inc()
+        return None
 
-    def get_cached(self, uri: BucketWithPrefix) -> Optional[Listing]:
-        entry = self._cache.get(uri)
-        return entry.elems if entry is not None else None
+    def get_search_index(
+        self,
+        uri: BucketWithPrefix,
+        elems: Listing,
+        *,
+        match_glob: Optional[str] = None,
+    ) -> Optional[SearchIndex]:
+        """Return the name index built for `elems` if they are the cached listing.
+
+        `elems` may also be a copy assembled from the pages streamed through
+        `on_page`; it then has the same length and last entry.
+        """
+        key = ListingKey(uri, match_glob)
+        entry = self._cache.peek(key)
+        if entry is None or len(entry.elems) != len(elems):
+            return None
+        last = len(elems) - 1
+        if (
+            entry.elems is not elems
+            and last >= 0
+            and entry.elems.full_path(last) != elems.full_path(last)
+        ):
+            return None
+        if entry.search_index is None:
+            search_index = SearchIndex.for_listing(uri, entry.elems)
+            with self._lock:
+                if self._cache.peek(key) is entry:
+                    self._cache[key] = replace(entry, search_index=search_index)
+            return search_index
+        return entry.search_index
 
-    def _fetch(self, uri: BucketWithPrefix) -> Listing:
-        if not uri.bucket_name:
-            return self._storage.list_buckets()
+    def _fetch_pages(self, key: ListingKey) -> Iterator[Listing]:
+        pages: Iterable[Sequence[BucketWithPrefix]]
+        if not key.uri.bucket_name:
+            pages = [self._storage.list_buckets()]
         else:
-            return self._storage.list_prefix(uri=uri)
+            pages = self._storage.list_prefix_pages(
+                uri=key.uri, match_glob=key.match_glob
+            )
+        for page in pages:
+            yield page if isinstance(page, ColumnarListing) else ColumnarListing(page)
 
     def refresh_async(
         self,
@@ -66,38 +360,235 @@ class ListingService:
         *,
         on_success: OnSuccess,
         on_error: Optional[OnError] = None,
+        on_page: Optional[OnPage] = None,
+        on_restored: Optional[OnPage] = None,
+        supersede: bool = True,
+        match_glob: Optional[str] = None,
     ) -> None:
-        """Refresh a listing in the background.
+        """Refresh a listing (filtered by `match_glob`, if given) in the background.
 
         - `on_success` is only called if the new listing differs from the cached one.
-        - Callbacks are invoked on the worker thread.
+          It also receives the `ListingDelta` from the cached listing, or None if
+          nothing was cached.
+        - If `on_page` is given, every page is passed to it as soon as it arrives
+          (at least one, possibly empty). The streamed pages then count as what the
+          caller has already seen, so `on_success` is not called with the same
+          listing again.
+        - If nothing is cached in memory and `on_restored` is given, the listing
+          saved in the disk cache (if any) is read on the worker and passed to it
+          before the fetch starts. It then counts as what the caller has already
+          seen: no pages are streamed, and `on_success` gets the delta from it.
+        - A refresh for a `uri` that is already being listed joins that request
+          instead of starting another one; pages that arrived earlier are replayed.
+        - With `supersede`, requests for other URIs are dropped and their callers
+          get no further callbacks. Queued ones are cancelled; running ones stop
+          after their next page, unless joined again by then. A prefetch that a
+          caller joined goes on as a plain prefetch; prefetches run on their own
+          pool.
+        - Callbacks are invoked on a worker thread.
         """
+        subscriber = _Subscriber(
+            on_success=on_success,
+            on_error=on_error,
+            on_page=on_page,
+            on_restored=on_restored,
+            baseline=None,
+        )
+        key = ListingKey(uri, match_glob)
+        with self._lock:
+            if supersede:
+                for other_key, other in list(self._in_flight.items()):
+                    if other_key == key or not other.subscribers:
+                        continue
+                    if (
+                        not other.started
+                        and other.future is not None
+                        and other.future.cancel()
+                    ):
+                        del self._in_flight[other_key]
+                    else:
+                        # Already listing; `_run_job` stops it at its next page
+                        # unless another caller joins it first.
+                        other.subscribers.clear()
+
+            subscriber.baseline = self._cache.peek(key)
+
+            job = self._in_flight.get(key)
+            if (
+                job is not None
+                and job.prefetch
+                and not job.started
+                and job.future is not None
+                and job.future.cancel()
+            ):
+                # Don't wait behind other prefetches; list it in the foreground.
+                del self._in_flight[key]
+                job = None
+            if job is not None:
+                job.subscribers.append(subscriber)
+                return
+            job = _InFlight(epoch=self._epoch, subscribers=[subscriber])
+            self._in_flight[key] = job
+            job.future = self._executor.submit(self._run, key, job)
+
+    def prefetch(self, uris: Iterable[BucketWithPrefix]) -> int:
+        """Speculatively list `uris` into the cache on the prefetch pool.
+
+        URIs that are being listed or were fetched within `prefetch_fresh_for`
+        are skipped. At most `max_pending_prefetches` prefetches are queued or
+        running at a time, and a prefetch gives up (without caching anything)
+        once a listing reaches `max_prefetch_pages` pages. Errors are
+        ignored. Returns the number of prefetches started.
+        """
+        now = datetime.now(timezone.utc)
+        started = 0
         with self._lock:
-            gen = self._generation.get(uri, 0) + 1
-            self._generation[uri] = gen
-            cached = self._cache.get(uri)
-            cached_sig = cached.signature if cached is not None else None
+            budget = self._max_pending_prefetches - sum(
+                1 for job in self._in_flight.values() if job.prefetch
+            )
+            for uri in uris:
+                if budget <= 0:
+                    break
+                key = ListingKey(uri)
+                if key in self._in_flight:
+                    continue
+                entry = self._cache.peek(key)
+                if entry is not None and now - entry.fetched_at < self._prefetch_fresh_for:
+                    continue
+                job = _InFlight(epoch=self._epoch, prefetch=True)
+                self._in_flight[key] = job
+                job.future = self._prefetch_executor.submit(self._run, key, job)
+                metrics.counter("listing.prefetch.started").inc()
+                budget -= 1
+                started += 1
+        return started
+
+    def _take_pages(self, job: _InFlight) -> list[tuple[_Subscriber, list[Listing]]]:
+        """Collect the pages each streaming subscriber has not seen yet (locked)."""
+        deliveries = []
+        for subscriber in job.subscribers:
+            if subscriber.on_page is None:
+                continue
+            todo = job.pages[subscriber.pages_delivered :]
+            if todo:
+                subscriber.pages_delivered = len(job.pages)
+                deliveries.append((subscriber, todo))
+        return deliveries
 
-        def _worker() -> None:
-            try:
-                refreshed = self._fetch(uri)
-                refreshed_sig = _listing_signature(refreshed)
+    def _is_current(self, key: ListingKey, job: _InFlight) -> bool:
+        return self._in_flight.get(key) is job
 
+    def _run(self, key: ListingKey, job: _InFlight) -> None:
+        """Run one listing request, timed in `listing` (or `listing.prefetch`)."""
+        with metrics.timed("listing.prefetch" if job.prefetch else "listing"):
+            self._run_job(key, job)
+
+    def _restore_from_disk(self, key: ListingKey, job: _InFlight) -> None:
+        """Hand the disk-cached listing to subscribers that asked for it."""
+        with self._lock:
+            waiting = [
+                subscriber
+                for subscriber in job.subscribers
+                if subscriber.on_restored is not None and subscriber.baseline is None
+            ]
+        if not waiting:
+            return
+        entry = self._load_from_disk(key, job)
+        if entry is None:
+            return
+        metrics.counter("listing.cache.disk_hits").inc()
+        with self._lock:
+            for subscriber in waiting:
+                subscriber.baseline = entry
+                subscriber.on_page = None
+        for subscriber in waiting:
+            subscriber.on_restored(entry.elems)  # type: ignore[misc]
+
+    def _run_job(self, key: ListingKey, job: _InFlight) -> None:
+        with self._lock:
+            job.started = True
+
+        try:
+            self._restore_from_disk(key, job)
+            digest = ListingDigest()
+            started = time.perf_counter()
+            for page in self._fetch_pages(key):
+                if not job.pages:
+                    metrics.histogram("listing.first_page.seconds").observe(
+                        time.perf_counter() - started
+                    )
+                digest.update(page)
                 with self._lock:
-                    if self._generation.get(uri, 0) != gen:
+                    job.pages.append(page)
+                    if not job.subscribers and not job.prefetch:
+                        # Superseded by a request nobody joined back; free the worker.
+                        if self._is_current(key, job):
+                            del self._in_flight[key]
+                        metrics.counter("listing.superseded").inc()
                         return
-                    self._cache[uri] = ListingCacheEntry(
+                    if (
+                        job.prefetch
+                        and not job.subscribers
+                        and len(job.pages) >= self._max_prefetch_pages
+                    ):
+                        # Too big to list on speculation; leave it to an explicit refresh.
+                        if self._is_current(key, job):
+                            del self._in_flight[key]
+                        metrics.counter("listing.prefetch.abandoned").inc()
+                        return
+                    deliveries = self._take_pages(job)
+                for subscriber, pages in deliveries:
+                    for pending in pages:
+                        subscriber.on_page(pending)  # type: ignore[misc]
+            with self._lock:
+                if not job.pages:
+                    job.pages.append(ColumnarListing())
+
+            metrics.histogram("listing.pages", COUNT_BUCKETS).observe(len(job.pages))
+            refreshed = ColumnarListing.concat(job.pages)
+            metrics.counter("listing.entries").inc(len(refreshed))
+            refreshed_sig = digest.hexdigest()
+            search_index = SearchIndex.for_listing(key.uri, refreshed)
+
+            fetched_at = datetime.now(timezone.utc)
+            with self._lock:
+                if self._is_current(key, job):
+                    del self._in_flight[key]
+                is_current_epoch = job.epoch == self._epoch and not job.invalidated
+                if is_current_epoch:
+                    self._cache[key] = ListingCacheEntry(
                         elems=refreshed,
                         signature=refreshed_sig,
-                        fetched_at=datetime.now(timezone.utc),
+                        fetched_at=fetched_at,
+                        search_index=search_index,
                     )
-                    should_notify = cached_sig != refreshed_sig
-
-                if should_notify:
-                    on_success(refreshed)
-            except BaseException as e:
-                if on_error is not None:
-                    on_error(e)
+                    metrics.gauge("listing.cache.bytes").set(self._cache.stats.bytes)
+                deliveries = self._take_pages(job)
+                subscribers = list(job.subscribers)
+        except BaseException as e:
+            # Errors are handed to the subscribers, so `timed` never sees them.
+            metrics.counter(f"listing.errors.{type(e).__name__}").inc()
+            with self._lock:
+                if self._is_current(key, job):
+                    del self._in_flight[key]
+                subscribers = list(job.subscribers)
+            for subscriber in subscribers:
+                if subscriber.on_error is not None:
+                    subscriber.on_error(e)
+            return
 
-        threading.Thread(target=_worker, daemon=True).start()
+        for subscriber, pages in deliveries:
+            for pending in pages:
+                subscriber.on_page(pending)  # type: ignore[misc]
+        for subscriber in subscribers:
+            if subscriber.on_page is not None:
+                continue
+            baseline = subscriber.baseline
+            if baseline is None:
+                subscriber.on_success(refreshed, None)
+            elif baseline.signature != refreshed_sig:
+                subscriber.on_success(refreshed, diff_listings(baseline.elems, refreshed))
 
+        if is_current_epoch and self._disk_cache is not None:
+            # Written after the callbacks so the UI never waits on the disk.
+            self._disk_cache.store(self._disk_key(key), refreshed, refreshed_sig, fetched_at)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Upper bounds, in seconds, of the latency histogram buckets: 1ms to ~65s,
+# doubling each time. Larger samples land in an overflow bucket.
+LATENCY_BUCKETS: tuple[float, ...] = tuple(0.001 * 2**i for i in range(17))
+# Bytes per second, from 1 KiB/s to 16 GiB/s.
+THROUGHPUT_BUCKETS: tuple[float, ...] = tuple(1024.0 * 2**i for i in range(25))
+# Plain counts, e.g. pages per listing.
+COUNT_BUCKETS: tuple[float, ...] = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+
+class Counter:
+    """A monotonically increasing count."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"type": "counter", "value": self._value}
+
+
+class Gauge:
+    """A value that goes up and down, e.g. the number of requests in flight."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: int) -> None:
+        with self._lock:
+            self._value = value
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"type": "gauge", "value": self._value}
+
+
+class Histogram:
+    """Counts samples into fixed buckets; quantiles are bucket upper bounds."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+
+    def observe(self, value: float) -> None:
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[slot] += 1
+            self._count += 1
+            self._sum += value
+            self._max = max(self._max, value)
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def quantile(self, q: float) -> float:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            largest = self._max
+        if total == 0:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for slot, count in enumerate(counts):
+            seen += count
+            if seen >= rank and count:
+                if slot == len(self.buckets):
+                    break
+                return min(self.buckets[slot], largest)
+        return largest
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            count, total, largest = self._count, self._sum, self._max
+        return {
+            "type": "histogram",
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": largest,
+        }
+
+
+class MetricsRegistry:
+    """Named counters, gauges and histograms, created on first use.
+
+    Names are dotted, starting with the component that records them, e.g.
+    `storage.list_page.seconds` or `listing.cache.hits`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Any] = {}
+
+    def _get(self, name: str, kind: type[T], create: Callable[[], T]) -> T:
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(name, create())
+        if not isinstance(metric, kind):
+            raise TypeError(f"metric {name!r} is a {type(metric).__name__}")
+        return metric
+
+    def counter(self, name: str) -> Counter:
+        return self._get(name, Counter, Counter)
+
+    def gauge(self, name: str) -> Gauge:
+        return self._get(name, Gauge, Gauge)
+
+    def histogram(
+        self, name: str, buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> Histogram:
+        """Return the histogram `name`; `buckets` only applies when creating it."""
+        return self._get(name, Histogram, lambda: Histogram(buckets))
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        """Time a block into the `<name>.seconds` histogram.
+
+        `<name>.in_flight` counts the blocks running. Exceptions are counted in
+        `<name>.errors` and per exception type, so throttling (`TooManyRequests`)
+        stands out from other failures.
+        """
+        in_flight = self.gauge(f"{name}.in_flight")
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self.counter(f"{name}.errors").inc()
+            self.counter(f"{name}.errors.{type(e).__name__}").inc()
+            raise
+        finally:
+            self.histogram(f"{name}.seconds").observe(time.perf_counter() - start)
+            in_flight.dec()
+
+    def timed_iter(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """Yield from `items`, timing how long each item takes to arrive."""
+        iterator = iter(items)
+        while True:
+            with self.timed(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        return {name: metric.snapshot() for name, metric in metrics}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._metrics.clear()
+
+
+# The registry every component records into.
+metrics = MetricsRegistry()
+
+
+class JsonlExporter:
+    """Appends a snapshot of a registry to a JSON Lines file every `interval` seconds.
+
+    Each line is `{"time": <unix time>, "metrics": {...}}`. A last snapshot is
+    written by `stop()`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        registry: Optional[MetricsRegistry] = None,
+        *,
+        interval: float = 5.0,
+    ) -> None:
+        self.path = path
+        self.interval = interval
+        self._registry = registry if registry is not None else metrics
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._loop, name="burf-metrics", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+    def write(self) -> None:
+        line = json.dumps({"time": time.time(), "metrics": self._registry.snapshot()})
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError:
+            return
+
+    def _loop(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.write()
@@ -0,0 +1,66 @@
+import cProfile
+import pstats
+import sys
+import threading
+from types import FrameType
+from typing import Any, Optional
+
+
+class _Snapshot:
+    """Hands a profile's stats to `pstats.Stats` without disabling it.
+
+    `Profile.create_stats` disables the profiler, which only works from the
+    thread that enabled it; worker threads may still be running.
+    """
+
+    def __init__(self, profile: cProfile.Profile) -> None:
+        self._profile = profile
+        self.stats: dict[Any, Any] = {}
+
+    def create_stats(self) -> None:
+        self._profile.snapshot_stats()
+        self.stats = self._profile.stats  # type: ignore[attr-defined]
+
+
+class SessionProfiler:
+    """Deterministic profile of every thread, saved as one pstats file.
+
+    Before Python 3.12 a profiler only sees the thread that enabled it, so
+    each thread started after `start()` gets its own, and `stop()` merges
+    them. From 3.12 on, cProfile is built on `sys.monitoring` and one
+    profiler sees every thread. Threads already running when `start()` is
+    called are not profiled before 3.12.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._main: Optional[cProfile.Profile] = None
+        self._threads: list[cProfile.Profile] = []
+
+    def start(self) -> None:
+        self._main = cProfile.Profile()
+        if sys.version_info < (3, 12):
+            threading.setprofile(self._profile_thread)
+        self._main.enable()
+
+    def _profile_thread(self, frame: FrameType, event: str, arg: Any) -> None:
+        # Installed by `threading` in each new thread; only needed once per thread.
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with self._lock:
+            self._threads.append(profile)
+        profile.enable()
+
+    def stop(self) -> None:
+        """Stop profiling and write the merged profile to `path`."""
+        if self._main is None:
+            return
+        threading.setprofile(None)  # type: ignore[arg-type]
+        self._main.disable()
+        with self._lock:
+            profiles = [self._main, *self._threads]
+            self._threads.clear()
+        self._main = None
+        stats = pstats.Stats(*(_Snapshot(profile) for profile in profiles))
+        stats.dump_stats(self.path)
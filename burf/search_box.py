@@ -1,12 +1,56 @@
 from textual.binding import Binding
 from textual.widgets import Input
 
+from burf.file_list_view import FileListView
+from burf.search_index import CASE_SENSITIVE_BY_DEFAULT
+
 
 class SearchBox(Input):
     BINDINGS = [
         Binding("escape", "cancel_search", "cancel search"),
+        Binding("down,ctrl+n", "next_match", "next match"),
+        Binding("up,ctrl+p", "previous_match", "previous match"),
+        Binding("ctrl+t", "toggle_case", "toggle case"),
+        Binding("ctrl+f", "toggle_fuzzy", "toggle fuzzy"),
     ]
 
+    case_sensitive = CASE_SENSITIVE_BY_DEFAULT
+    fuzzy = False
+
+    def on_mount(self) -> None:
+        self._update_placeholder()
+
+    def _update_placeholder(self) -> None:
+        case = "match case" if self.case_sensitive else "ignore case"
+        mode = "fuzzy" if self.fuzzy else "substring"
+        self.placeholder = f"search ({case}, {mode})"
+
+    def search(self, *, backward: bool = False, include_current: bool = False) -> None:
+        file_list = self.app.query_one("#file_list", FileListView)
+        file_list.search_and_highlight(
+            self.value,
+            backward=backward,
+            include_current=include_current,
+            case_sensitive=self.case_sensitive,
+            fuzzy=self.fuzzy,
+        )
+
     def action_cancel_search(self) -> None:
         self.value = ""
         self.app.query_one("#file_list").focus()
+
+    def action_next_match(self) -> None:
+        self.search()
+
+    def action_previous_match(self) -> None:
+        self.search(backward=True)
+
+    def action_toggle_case(self) -> None:
+        self.case_sensitive = not self.case_sensitive
+        self._update_placeholder()
+        self.search(include_current=True)
+
+    def action_toggle_fuzzy(self) -> None:
+        self.fuzzy = not self.fuzzy
+        self._update_placeholder()
+        self.search(include_current=True)
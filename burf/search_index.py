@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import bisect
+import re
+from array import array
+from typing import Iterable, NamedTuple, Optional
+
+from burf.storage.ds import BucketWithPrefix, ColumnarListing
+
+# Shared by the search box and the list's own search, so both start out alike.
+CASE_SENSITIVE_BY_DEFAULT = False
+
+
+class SearchQuery(NamedTuple):
+    """A name search with its options, kept so n/N can repeat it as it was."""
+
+    text: str
+    case_sensitive: bool = CASE_SENSITIVE_BY_DEFAULT
+    fuzzy: bool = False
+
+
+class _Text:
+    """Names joined into one newline separated string plus their start offsets."""
+
+    def __init__(self, names: Iterable[str]) -> None:
+        starts = array("q")
+        parts: list[str] = []
+        offset = 0
+        for name in names:
+            starts.append(offset)
+            parts.append(name)
+            offset += len(name) + 1
+        starts.append(offset)
+        self.text = "\n".join(parts) + "\n" if parts else ""
+        self.starts = starts
+        self._reversed: Optional[str] = None
+
+    @property
+    def reversed(self) -> str:
+        if self._reversed is None:
+            self._reversed = self.text[::-1]
+        return self._reversed
+
+    def row_at(self, offset: int) -> int:
+        return bisect.bisect_right(self.starts, offset) - 1
+
+
+class SearchIndex:
+    """Name index for fast substring and fuzzy lookups over one listing.
+
+    All names live in a single string so each lookup is one C-level `str.find`
+    or regex scan, whatever the number of rows. Backward fuzzy search runs
+    forward over the reversed text, since a reversed subsequence match is a
+    match of the reversed query.
+    """
+
+    def __init__(self, names: Iterable[str]) -> None:
+        cleaned = [name.replace("\n", " ") for name in names]
+        self._count = len(cleaned)
+        self._exact = _Text(cleaned)
+        # Case-insensitive is the default mode, so fold up front rather than on
+        # the first keystroke.
+        self._folded = _Text(name.casefold() for name in cleaned)
+
+    @classmethod
+    def for_listing(cls, uri: BucketWithPrefix, elems: ColumnarListing) -> SearchIndex:
+        """Index the names as shown in the list: relative to `uri`'s folder."""
+        base_prefix = uri.full_prefix if uri.bucket_name != "" else ""
+        names = []
+        for path in elems.paths():
+            slash = path.index("/")
+            if slash == len(path) - 1:
+                # A bucket row.
+                names.append(path[:slash])
+                continue
+            name = path[slash + 1 :]
+            if base_prefix and name.startswith(base_prefix):
+                name = name[len(base_prefix) :]
+            names.append(name)
+        return cls(names)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _text(self, case_sensitive: bool) -> _Text:
+        return self._exact if case_sensitive else self._folded
+
+    def find(
+        self,
+        query: str,
+        start_row: int,
+        *,
+        backward: bool = False,
+        case_sensitive: bool = CASE_SENSITIVE_BY_DEFAULT,
+        fuzzy: bool = False,
+    ) -> Optional[int]:
+        """Return the first row matching `query`, starting at `start_row`.
+
+        Searches forward (or backward) from `start_row` inclusive and wraps
+        around the listing. Returns None if no row matches.
+        """
+        query = query.replace("\n", " ")
+        count = self._count
+        if not query or count == 0:
+            return None
+        if not case_sensitive:
+            query = query.casefold()
+        start_row = start_row % count
+        text = self._text(case_sensitive)
+
+        if backward:
+            # Mirror the search: rows before `start_row` become rows after it.
+            end = text.starts[start_row + 1] - 1
+            offset = self._search(
+                text.reversed, query[::-1], len(text.text) - end, fuzzy
+            )
+            if offset is None:
+                return None
+            return text.row_at(len(text.text) - 1 - offset)
+
+        offset = self._search(text.text, query, text.starts[start_row], fuzzy)
+        if offset is None:
+            return None
+        return text.row_at(offset)
+
+    @staticmethod
+    def _search(text: str, query: str, start: int, fuzzy: bool) -> Optional[int]:
+        if fuzzy:
+            # `[^\nc]*c` advances to the next `c` without backtracking.
+            pattern = re.compile(
+                re.escape(query[0])
+                + "".join(
+                    f"[^\n{re.escape(char)}]*{re.escape(char)}" for char in query[1:]
+                )
+            )
+            match = pattern.search(text, start) or pattern.search(text, 0, start)
+            return match.start() if match is not None else None
+
+        offset = text.find(query, start)
+        if offset == -1:
+            offset = text.find(query, 0, start)
+        return offset if offset != -1 else None
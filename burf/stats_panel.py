@@ -0,0 +1,89 @@
+from typing import Any, Optional
+
+from rich.table import Table
+from textual.timer import Timer
+from textual.widgets import Static
+
+from burf.metrics import MetricsRegistry, metrics
+from burf.util import human_readable_bytes
+
+
+def _format_value(name: str, value: float) -> str:
+    """Format `value` according to the unit in the metric's name."""
+    if name.endswith(".seconds"):
+        return f"{value * 1000:.0f}ms" if value < 1 else f"{value:.1f}s"
+    if name.endswith("bytes_per_second"):
+        return f"{human_readable_bytes(int(value))}/s"
+    if name.endswith("bytes"):
+        return human_readable_bytes(int(value))
+    return f"{value:g}"
+
+
+class StatsPanel(Static):
+    """Live view of the metrics registry, refreshed while it is shown."""
+
+    DEFAULT_CSS = """
+        StatsPanel {
+            dock: right;
+            width: 64;
+            height: 100%;
+            display: none;
+            border-left: solid $accent;
+            padding: 0 1;
+            overflow-y: auto;
+        }
+    """
+
+    REFRESH_INTERVAL = 1.0
+
+    def __init__(
+        self,
+        registry: Optional[MetricsRegistry] = None,
+        *,
+        name: Optional[str] = None,
+        id: Optional[str] = None,
+        classes: Optional[str] = None,
+    ) -> None:
+        super().__init__(name=name, id=id, classes=classes)
+        self._registry = registry if registry is not None else metrics
+        self._timer: Optional[Timer] = None
+
+    @property
+    def shown(self) -> bool:
+        return bool(self.styles.display != "none")
+
+    def toggle(self) -> None:
+        if self.shown:
+            self.styles.display = "none"
+            if self._timer is not None:
+                self._timer.pause()
+            return
+        self.styles.display = "block"
+        self.update_stats()
+        if self._timer is None:
+            self._timer = self.set_interval(self.REFRESH_INTERVAL, self.update_stats)
+        else:
+            self._timer.resume()
+
+    def update_stats(self) -> None:
+        self.update(self._render_table(self._registry.snapshot()))
+
+    def _render_table(self, snapshot: dict[str, dict[str, Any]]) -> Table:
+        table = Table(
+            title="stats", expand=True, box=None, show_edge=False, pad_edge=False
+        )
+        table.add_column("metric", ratio=1, overflow="fold")
+        table.add_column("n", justify="right")
+        table.add_column("p50", justify="right")
+        table.add_column("p95", justify="right")
+        table.add_column("max", justify="right")
+        for name, values in snapshot.items():
+            if values["type"] != "histogram":
+                table.add_row(name, _format_value(name, values["value"]))
+                continue
+            table.add_row(
+                name,
+                str(values["count"]),
+                *(_format_value(name, values[q]) for q in ("p50", "p95", "max")),
+            )
+        return table
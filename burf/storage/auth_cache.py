@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, ClassVar, Optional
+
+import google.auth
+from google.auth import _cloud_sdk, environment_vars
+from google.auth.credentials import Credentials
+from google.auth.exceptions import GoogleAuthError
+
+_CACHE_VERSION = 1
+
+# Environment variables that change which credentials or project ADC resolves.
+_AUTH_ENV_VARS = (
+    environment_vars.CREDENTIALS,
+    environment_vars.PROJECT,
+    environment_vars.LEGACY_PROJECT,
+    environment_vars.CLOUD_SDK_CONFIG_DIR,
+    "CLOUDSDK_CORE_PROJECT",
+    "CLOUDSDK_ACTIVE_CONFIG_NAME",
+    environment_vars.GCE_METADATA_HOST,
+    environment_vars.GCE_METADATA_IP,
+    environment_vars.NO_GCE_CHECK,
+)
+
+SOURCE_FILE = "file"
+SOURCE_GCE = "gce"
+
+
+@dataclass(frozen=True)
+class ResolvedAuth:
+    """Where Application Default Credentials came from, and the project found.
+
+    Only the location of the credentials is kept, never their secrets.
+    """
+
+    source: str
+    credential_type: str
+    project: Optional[str]
+    credentials_file: Optional[str] = None
+
+
+def _stat_key(path: str) -> Optional[tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _explicit_credentials_file() -> Optional[str]:
+    return os.environ.get(environment_vars.CREDENTIALS) or None
+
+
+def auth_fingerprint() -> str:
+    """Hash everything ADC resolution depends on that can be checked cheaply.
+
+    That is the relevant environment variables plus the size and mtime of the
+    credential files and of the active gcloud configuration, which holds the
+    default project.
+    """
+    config_dir = _cloud_sdk.get_config_path()
+    active_config_path = os.path.join(config_dir, "active_config")
+    try:
+        with open(active_config_path, encoding="utf-8") as f:
+            active_config = f.read().strip()
+    except OSError:
+        active_config = "default"
+    active_config = os.environ.get("CLOUDSDK_ACTIVE_CONFIG_NAME") or active_config
+
+    files = [
+        _cloud_sdk.get_application_default_credentials_path(),
+        active_config_path,
+        os.path.join(config_dir, "configurations", f"config_{active_config}"),
+    ]
+    explicit_file = _explicit_credentials_file()
+    if explicit_file is not None:
+        files.append(explicit_file)
+
+    state = {
+        "env": {name: os.environ.get(name) for name in _AUTH_ENV_VARS},
+        "files": {path: _stat_key(path) for path in files},
+    }
+    encoded = json.dumps(state, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class AuthCache:
+    """Resolved ADC sources kept in memory and in a small JSON file.
+
+    Entries are keyed by `auth_fingerprint()`, so changing the environment,
+    the ADC file or the gcloud configuration makes the next launch resolve
+    credentials from scratch. Without `path` only the memory cache is used.
+    """
+
+    # Shared by every instance: one resolution per fingerprint and process.
+    _memory: ClassVar[dict[str, ResolvedAuth]] = {}
+    _memory_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, path: Optional[str] = None, *, max_entries: int = 8) -> None:
+        self.path = path
+        self.max_entries = max_entries
+
+    @classmethod
+    def in_dir(cls, cache_dir: str, **kwargs: Any) -> AuthCache:
+        return cls(os.path.join(cache_dir, "auth.json"), **kwargs)
+
+    def _read_entries(self) -> dict[str, Any]:
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != _CACHE_VERSION:
+            return {}
+        entries = data.get("entries")
+        return entries if isinstance(entries, dict) else {}
+
+    def load(self, fingerprint: str) -> Optional[ResolvedAuth]:
+        with self._memory_lock:
+            resolved = self._memory.get(fingerprint)
+        if resolved is not None:
+            return resolved
+        entry = self._read_entries().get(fingerprint)
+        if not isinstance(entry, dict):
+            return None
+        try:
+            resolved = ResolvedAuth(**entry)
+        except TypeError:
+            return None
+        with self._memory_lock:
+            self._memory[fingerprint] = resolved
+        return resolved
+
+    def store(self, fingerprint: str, resolved: ResolvedAuth) -> None:
+        """Remember `resolved`; failing to write the file is ignored."""
+        with self._memory_lock:
+            self._memory[fingerprint] = resolved
+        if self.path is None:
+            return
+        entries = self._read_entries()
+        entries.pop(fingerprint, None)
+        entries[fingerprint] = asdict(resolved)
+        # Dicts keep insertion order, so the oldest entries come first.
+        while len(entries) > self.max_entries:
+            del entries[next(iter(entries))]
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": _CACHE_VERSION, "entries": entries}, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            return
+
+    def clear(self) -> None:
+        with self._memory_lock:
+            self._memory.clear()
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                return
+
+
+def _describe(credentials: Credentials, project: Optional[str]) -> Optional[ResolvedAuth]:
+    """Return how to load `credentials` again without a full ADC search."""
+    from google.auth import compute_engine
+
+    credential_type = f"{type(credentials).__module__}.{type(credentials).__name__}"
+    # Same order as google.auth.default: the explicit file, then gcloud's file.
+    credentials_file = _explicit_credentials_file()
+    if credentials_file is None:
+        adc_path = _cloud_sdk.get_application_default_credentials_path()
+        if os.path.isfile(adc_path):
+            credentials_file = adc_path
+    if credentials_file is not None:
+        return ResolvedAuth(SOURCE_FILE, credential_type, project, credentials_file)
+    if isinstance(credentials, compute_engine.Credentials):
+        return ResolvedAuth(SOURCE_GCE, credential_type, project)
+    return None
+
+
+def _load(resolved: ResolvedAuth) -> Credentials:
+    if resolved.source == SOURCE_FILE and resolved.credentials_file is not None:
+        credentials, _ = google.auth.load_credentials_from_file(
+            resolved.credentials_file
+        )
+        return credentials
+    if resolved.source == SOURCE_GCE:
+        from google.auth import compute_engine
+
+        return compute_engine.Credentials()
+    raise ValueError(f"cannot load credentials from source {resolved.source!r}")
+
+
+def default_credentials(
+    cache: Optional[AuthCache] = None,
+) -> tuple[Credentials, Optional[str]]:
+    """Return Application Default Credentials and their project.
+
+    With a `cache` hit, the credentials are loaded straight from where they
+    were found last time and the project is reused. That skips probing the
+    metadata server and asking gcloud for the project, which can take seconds.
+    """
+    fingerprint = auth_fingerprint() if cache is not None else ""
+    if cache is not None:
+        resolved = cache.load(fingerprint)
+        if resolved is not None:
+            try:
+                return _load(resolved), resolved.project
+            except (GoogleAuthError, OSError, ValueError):
+                pass
+
+    credentials, project = google.auth.default()
+    if cache is not None:
+        resolved = _describe(credentials, project)
+        if resolved is not None:
+            cache.store(fingerprint, resolved)
+    return credentials, project
@@ -1,10 +1,47 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Optional, Sequence
+import re
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Any, Iterable, Iterator, Optional, Sequence, overload
+
+# Matches an empty or whitespace-only part of "/" + path + "/"; such parts are
+# dropped by `full_prefix_to_list`.
+_BLANK_PART = re.compile(r"/\s*/")
+
+
+def _canonical_prefix(full_prefix: str, is_blob: bool) -> str:
+    """Normalize a prefix the way `BucketWithPrefix.from_full_prefix` stores it."""
+    stripped = full_prefix.rstrip("/")
+    if _BLANK_PART.search(f"/{stripped}/") is not None:
+        stripped = "/".join(BucketWithPrefix.full_prefix_to_list(stripped))
+    if stripped != "" and not is_blob:
+        stripped += "/"
+    return stripped
 
 
 class BucketWithPrefix:
+    """An immutable bucket, folder or object address plus listing metadata.
+
+    Only the canonical `full_path` string is stored; `full_prefix`, `prefixes`
+    and `parent()` are derived from it on demand. Fields are read-only
+    properties over `__slots__`, and hashing goes through `full_path`, whose
+    hash Python caches on the string.
+    """
+
+    __slots__ = (
+        "_bucket_name",
+        "_is_blob",
+        "_size",
+        "_updated_at",
+        "_generation",
+        "_crc32c",
+        "_path",
+    )
+
     def __init__(
         self,
         bucket_name: str,
@@ -12,17 +49,37 @@ class BucketWithPrefix:
         is_blob: bool = False,
         size: Optional[int] = None,
         updated_at: Optional[datetime] = None,
+        generation: Optional[int] = None,
+        crc32c: Optional[str] = None,
     ) -> None:
-        self.bucket_name = bucket_name
-        self.is_blob = is_blob
-        self.size = size
-        self.updated_at = updated_at
         if isinstance(prefixes, str):
             raise TypeError(
                 "BucketWithPrefix(prefixes=...) must be a sequence of path parts, not a string"
             )
-        # Copy into a list so we have a stable internal representation.
-        self.prefixes = list(prefixes)
+        joined = "/".join(prefixes)
+        if joined != "" and not is_blob:
+            joined += "/"
+        self._init(bucket_name, joined, is_blob, size, updated_at, generation, crc32c)
+
+    def _init(
+        self,
+        bucket_name: str,
+        full_prefix: str,
+        is_blob: bool,
+        size: Optional[int],
+        updated_at: Optional[datetime],
+        generation: Optional[int],
+        crc32c: Optional[str],
+    ) -> None:
+        # Listings repeat the same bucket name on every entry; share one string.
+        bucket_name = sys.intern(bucket_name)
+        self._bucket_name = bucket_name
+        self._is_blob = is_blob
+        self._size = size
+        self._updated_at = updated_at
+        self._generation = generation
+        self._crc32c = crc32c
+        self._path = bucket_name + "/" + full_prefix
 
     @staticmethod
     def full_prefix_to_list(full_prefix: str) -> list[str]:
@@ -37,53 +94,449 @@ class BucketWithPrefix:
         is_blob: bool = False,
         size: Optional[int] = None,
         updated_at: Optional[datetime] = None,
+        generation: Optional[int] = None,
+        crc32c: Optional[str] = None,
     ) -> BucketWithPrefix:
         """Create from a single string prefix like 'a/b/c/' or 'a/b.txt'."""
-        return cls(
-            bucket_name=bucket_name,
-            prefixes=cls.full_prefix_to_list(full_prefix),
-            is_blob=is_blob,
-            size=size,
-            updated_at=updated_at,
+        self = cls.__new__(cls)
+        self._init(
+            bucket_name,
+            _canonical_prefix(full_prefix, is_blob),
+            is_blob,
+            size,
+            updated_at,
+            generation,
+            crc32c,
+        )
+        return self
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (
+            _restore,
+            (
+                self.bucket_name,
+                self.full_prefix,
+                self.is_blob,
+                self.size,
+                self.updated_at,
+                self.generation,
+                self.crc32c,
+            ),
         )
 
+    @property
+    def bucket_name(self) -> str:
+        return self._bucket_name
+
+    @property
+    def is_blob(self) -> bool:
+        return self._is_blob
+
+    @property
+    def size(self) -> Optional[int]:
+        return self._size
+
+    @property
+    def updated_at(self) -> Optional[datetime]:
+        return self._updated_at
+
+    @property
+    def generation(self) -> Optional[int]:
+        return self._generation
+
+    @property
+    def crc32c(self) -> Optional[str]:
+        return self._crc32c
+
+    @property
+    def prefixes(self) -> list[str]:
+        return self.full_prefix_to_list(self.full_prefix)
+
     @property
     def full_prefix(self) -> str:
-        joined = "/".join(self.prefixes)
-        if joined == "":
-            return ""
-        if not self.is_blob:
-            return joined + "/"
-        return joined
+        return self._path[len(self.bucket_name) + 1 :]
 
     @property
     def full_path(self) -> str:
-        return self.bucket_name + "/" + self.full_prefix
+        return self._path
 
     @property
     def is_bucket(self) -> bool:
-        return len(self.prefixes) == 0
+        return len(self._path) == len(self.bucket_name) + 1
 
     def parent(self) -> BucketWithPrefix:
         if self.bucket_name == "":
             return self
-        if len(self.prefixes) == 0:
+        if self.is_bucket:
             return BucketWithPrefix("", [])
-        else:
-            return BucketWithPrefix(self.bucket_name, self.prefixes[:-1])
+        full_prefix = self.full_prefix.rstrip("/")
+        return BucketWithPrefix.from_full_prefix(
+            self.bucket_name, full_prefix[: full_prefix.rfind("/") + 1]
+        )
 
     def get_last_part_of_address(self) -> str:
         if self.is_bucket:
             return self.bucket_name
-        return self.prefixes[-1]
+        full_prefix = self.full_prefix.rstrip("/")
+        return full_prefix[full_prefix.rfind("/") + 1 :]
 
     def __str__(self) -> str:
-        return self.full_path
+        return self._path
 
     def __hash__(self) -> int:
-        return hash(self.full_path)
+        return hash(self._path)
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, BucketWithPrefix):
             return False
-        return self.full_path == other.full_path and self.is_blob == other.is_blob
+        return self._path == other._path and self._is_blob == other._is_blob
+
+
+def _restore(
+    bucket_name: str,
+    full_prefix: str,
+    is_blob: bool,
+    size: Optional[int],
+    updated_at: Optional[datetime],
+    generation: Optional[int],
+    crc32c: Optional[str],
+) -> BucketWithPrefix:
+    return BucketWithPrefix.from_full_prefix(
+        bucket_name,
+        full_prefix,
+        is_blob=is_blob,
+        size=size,
+        updated_at=updated_at,
+        generation=generation,
+        crc32c=crc32c,
+    )
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_epoch_ns(value: datetime) -> int:
+    """Return an aware datetime as integer nanoseconds since the Unix epoch."""
+    return (value - _EPOCH) // _MICROSECOND * 1000
+
+
+def from_epoch_ns(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value // 1000)
+
+
+def _days_from_civil(year: int, month: int, day: int) -> int:
+    """Days from 1970-01-01 to a proleptic Gregorian date (H. Hinnant's algorithm)."""
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def _sliced_rfc3339_to_epoch_ns(value: str) -> int:
+    seconds = (
+        _days_from_civil(int(value[0:4]), int(value[5:7]), int(value[8:10])) * 86400
+        + int(value[11:13]) * 3600
+        + int(value[14:16]) * 60
+        + int(value[17:19])
+    )
+    micros = 0
+    position = 19
+    if value[position : position + 1] == ".":
+        end = position + 1
+        while end < len(value) and value[end].isdigit():
+            end += 1
+        micros = int(value[position + 1 : end][:6].ljust(6, "0"))
+        position = end
+    offset = value[position:]
+    if offset not in ("", "Z", "z"):
+        sign = -1 if offset[0] == "-" else 1
+        seconds -= sign * (int(offset[1:3]) * 3600 + int(offset[4:6]) * 60)
+    return (seconds * 1_000_000 + micros) * 1000
+
+
+def rfc3339_to_datetime(value: str) -> datetime:
+    """Parse an RFC 3339 timestamp, as the JSON API returns it, to an aware datetime.
+
+    `datetime.fromisoformat` is far cheaper than `strptime`. Python 3.10 only
+    takes 3 or 6 fractional digits there, so other forms are sliced by hand.
+    Sub-microsecond digits are truncated.
+    """
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return from_epoch_ns(_sliced_rfc3339_to_epoch_ns(value))
+
+
+def rfc3339_to_epoch_ns(value: str) -> int:
+    return to_epoch_ns(rfc3339_to_datetime(value))
+
+
+def _offsets_for(rows: Iterable[bytes]) -> array[int]:
+    """Offsets of newline-terminated `rows` packed back to back."""
+    return array("q", accumulate(map((1).__add__, map(len, rows)), initial=0))
+
+
+# Column markers for missing metadata: sizes and generations are never negative.
+_MISSING = -1
+_MISSING_TIME = -(2**63)
+_IS_BLOB = 1
+# Serialized header: format version, row count, names length. Arrays follow in
+# little-endian order.
+_HEADER = struct.Struct("<Bqq")
+_FORMAT_VERSION = 1
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+class ColumnarListing(Sequence[BucketWithPrefix]):
+    """A listing stored column by column instead of one object per entry.
+
+    Full paths are UTF-8 encoded into one buffer, each followed by a newline
+    (which object and bucket names cannot contain), with row offsets alongside.
+    Sizes, generations and update times (epoch nanoseconds) live in typed
+    arrays and the blob flag in a bytearray. Indexing materializes a
+    `BucketWithPrefix` for just that row.
+
+    Entries lose `crc32c`; listings shown in the UI do not request it.
+    """
+
+    __slots__ = ("_names", "_offsets", "_flags", "_sizes", "_updated", "_generations")
+
+    def __init__(self, entries: Iterable[BucketWithPrefix] = ()) -> None:
+        self._names = bytearray()
+        self._offsets = array("q", [0])
+        self._flags = bytearray()
+        self._sizes = array("q")
+        self._updated = array("q")
+        self._generations = array("q")
+        self.extend(entries)
+
+    @classmethod
+    def concat(cls, pages: Iterable[Iterable[BucketWithPrefix]]) -> ColumnarListing:
+        listing = cls()
+        for page in pages:
+            listing.extend(page)
+        return listing
+
+    def copy(self) -> ColumnarListing:
+        return ColumnarListing.concat([self])
+
+    def _append_path(
+        self,
+        path: str,
+        is_blob: bool,
+        size: Optional[int],
+        updated_ns: Optional[int],
+        generation: Optional[int],
+    ) -> None:
+        self._names += path.encode("utf-8")
+        self._names.append(10)  # "\n"
+        self._offsets.append(len(self._names))
+        self._flags.append(_IS_BLOB if is_blob else 0)
+        self._sizes.append(size if size is not None else _MISSING)
+        self._updated.append(updated_ns if updated_ns is not None else _MISSING_TIME)
+        self._generations.append(generation if generation is not None else _MISSING)
+
+    def append_object(
+        self,
+        bucket_name: str,
+        full_prefix: str,
+        *,
+        is_blob: bool = False,
+        size: Optional[int] = None,
+        updated_ns: Optional[int] = None,
+        generation: Optional[int] = None,
+    ) -> None:
+        """Append a row without building a `BucketWithPrefix` for it."""
+        self._append_path(
+            bucket_name + "/" + _canonical_prefix(full_prefix, is_blob),
+            is_blob,
+            size,
+            updated_ns,
+            generation,
+        )
+
+    def append(self, elem: BucketWithPrefix) -> None:
+        updated = elem.updated_at
+        self._append_path(
+            elem.full_path,
+            elem.is_blob,
+            elem.size,
+            to_epoch_ns(updated) if updated is not None else None,
+            elem.generation,
+        )
+
+    def extend(self, entries: Iterable[BucketWithPrefix]) -> None:
+        if not isinstance(entries, ColumnarListing):
+            for elem in entries:
+                self.append(elem)
+            return
+        base = len(self._names)
+        self._names += entries._names
+        self._offsets.extend(map(base.__add__, entries._offsets[1:]))
+        self._flags += entries._flags
+        self._sizes.extend(entries._sizes)
+        self._updated.extend(entries._updated)
+        self._generations.extend(entries._generations)
+
+    def __len__(self) -> int:
+        return len(self._flags)
+
+    def __repr__(self) -> str:
+        return f"ColumnarListing(<{len(self)} entries>)"
+
+    @overload
+    def __getitem__(self, index: int) -> BucketWithPrefix:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> ColumnarListing:
+        ...
+
+    def __getitem__(self, index: int | slice) -> BucketWithPrefix | ColumnarListing:
+        if isinstance(index, slice):
+            return self.take(range(len(self))[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ColumnarListing index out of range")
+
+        path = self.full_path(index)
+        slash = path.index("/")
+        size = self._sizes[index]
+        updated = self._updated[index]
+        generation = self._generations[index]
+        elem = BucketWithPrefix.__new__(BucketWithPrefix)
+        elem._init(
+            path[:slash],
+            path[slash + 1 :],
+            self._flags[index] == _IS_BLOB,
+            size if size != _MISSING else None,
+            from_epoch_ns(updated) if updated != _MISSING_TIME else None,
+            generation if generation != _MISSING else None,
+            None,
+        )
+        return elem
+
+    def __iter__(self) -> Iterator[BucketWithPrefix]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def full_path(self, index: int) -> str:
+        return self._names[self._offsets[index] : self._offsets[index + 1] - 1].decode(
+            "utf-8"
+        )
+
+    def is_blob(self, index: int) -> bool:
+        return self._flags[index] == _IS_BLOB
+
+    def paths(self) -> list[str]:
+        """Return every row's full path, decoded in one pass."""
+        if not self._flags:
+            return []
+        return self._names[:-1].decode("utf-8").split("\n")
+
+    def metadata(self, index: int) -> tuple[int, int, int, int]:
+        """Return the row's kind, size, update time and generation, comparably."""
+        return (
+            self._flags[index],
+            self._sizes[index],
+            self._updated[index],
+            self._generations[index],
+        )
+
+    def column_buffers(self) -> tuple[Any, ...]:
+        """Return the raw columns, e.g. for hashing.
+
+        Each one only grows by appending, so feeding pages' buffers to separate
+        running hashes gives the same result however the rows were paged.
+        """
+        return (self._names, self._flags, self._sizes, self._updated, self._generations)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            len(self._names)
+            + len(self._flags)
+            + 8 * (len(self._offsets) + 3 * len(self._flags))
+        )
+
+    def take(self, indices: Iterable[int]) -> ColumnarListing:
+        """Return a new listing holding the rows at `indices`, in that order."""
+        indices = list(indices)
+        rows = bytes(self._names).split(b"\n")
+        listing = ColumnarListing()
+        if indices:
+            listing._names = bytearray(b"\n".join(map(rows.__getitem__, indices)) + b"\n")
+        listing._offsets = _offsets_for(map(rows.__getitem__, indices))
+        listing._flags = bytearray(map(self._flags.__getitem__, indices))
+        listing._sizes = array("q", map(self._sizes.__getitem__, indices))
+        listing._updated = array("q", map(self._updated.__getitem__, indices))
+        listing._generations = array("q", map(self._generations.__getitem__, indices))
+        return listing
+
+    def sorted_by(self, key: str = "name", *, reverse: bool = False) -> ColumnarListing:
+        """Return the listing sorted by "name", "size" or "updated".
+
+        Only a permutation of row numbers is sorted, keyed straight off a
+        column, so no entries are materialized. Names compare as UTF-8 bytes,
+        which is the order GCS lists them in.
+        """
+        if key == "name":
+            column: Sequence[Any] = bytes(self._names).split(b"\n")
+        elif key == "size":
+            column = self._sizes
+        elif key == "updated":
+            column = self._updated
+        else:
+            raise ValueError(f"cannot sort a listing by {key!r}")
+        order = sorted(range(len(self)), key=column.__getitem__, reverse=reverse)
+        return self.take(order)
+
+    def to_bytes(self) -> bytes:
+        columns = [self._sizes, self._updated, self._generations]
+        if not _LITTLE_ENDIAN:
+            columns = [array("q", column) for column in columns]
+            for column in columns:
+                column.byteswap()
+        return b"".join(
+            [
+                _HEADER.pack(_FORMAT_VERSION, len(self), len(self._names)),
+                self._names,
+                self._flags,
+                *(column.tobytes() for column in columns),
+            ]
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> ColumnarListing:
+        """Rebuild a listing from `to_bytes` output; raises ValueError if malformed."""
+        version, count, names_length = _HEADER.unpack_from(data)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"unsupported listing format {version}")
+        view = memoryview(data)[_HEADER.size :]
+        expected = names_length + count + 3 * 8 * count
+        if len(view) != expected:
+            raise ValueError("truncated listing")
+
+        listing = cls()
+        listing._names = bytearray(view[:names_length])
+        view = view[names_length:]
+        listing._flags = bytearray(view[:count])
+        view = view[count:]
+        columns = []
+        for _ in range(3):
+            column = array("q")
+            column.frombytes(view[: 8 * count])
+            if not _LITTLE_ENDIAN:
+                column.byteswap()
+            columns.append(column)
+            view = view[8 * count :]
+        listing._sizes, listing._updated, listing._generations = columns
+        rows = bytes(listing._names).split(b"\n")
+        if len(rows) != count + 1 or rows[-1] != b"":
+            raise ValueError("listing names do not match its row count")
+        listing._offsets = _offsets_for(rows[:-1])
+        return listing
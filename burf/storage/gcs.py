@@ -0,0 +1,426 @@
+import itertools
+import math
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Iterable, Iterator, List, Optional, Sequence
+
+from google.api_core import exceptions as api_exceptions
+from google.api_core.exceptions import NotFound
+from google.auth.credentials import Credentials
+from google.cloud.storage import Blob, Client  # type: ignore
+from google.cloud.storage.bucket import _blobs_page_start  # type: ignore
+
+from burf.metrics import metrics
+from burf.storage.auth_cache import AuthCache, default_credentials
+from burf.storage.ds import (
+    BucketWithPrefix,
+    ColumnarListing,
+    rfc3339_to_datetime,
+    rfc3339_to_epoch_ns,
+)
+from burf.storage.storage import (
+    ALL_FIELDS,
+    LISTING_FIELDS,
+    DeleteResult,
+    OnDeleteResult,
+    Storage,
+)
+from burf.util import file_crc32c
+
+
+# Characters with a meaning in GCS match globs.
+_GLOB_SPECIAL = re.compile(r"([*?\[\]{}\\])")
+
+
+def glob_under_prefix(prefix: str, pattern: str) -> str:
+    """Return a match glob for `pattern` applied to the names under `prefix`.
+
+    The prefix is matched literally, so `*.parquet` under `data/` only matches
+    the objects directly in that folder.
+    """
+    return _GLOB_SPECIAL.sub(r"[\1]", prefix) + pattern
+
+
+def _raw_item(_: Any, item: dict[str, Any]) -> dict[str, Any]:
+    return item
+
+
+class GCS(Storage):
+    # The JSON API accepts up to 100 calls in one batch request.
+    DELETE_BATCH_SIZE = 100
+
+    credentials: Optional[Credentials]
+    client: Client
+
+    def __init__(
+        self,
+        credentials: Optional[Credentials] = None,
+        *,
+        max_concurrent_delete_batches: int = 4,
+        sliced_download_threshold: int = 256 * 1024 * 1024,
+        sliced_download_max_slices: int = 8,
+        sliced_download_min_slice_size: int = 32 * 1024 * 1024,
+        auth_cache: Optional[AuthCache] = None,
+    ):
+        self.credentials = credentials
+        self.auth_cache = auth_cache
+        self.max_concurrent_delete_batches = max_concurrent_delete_batches
+        self.sliced_download_threshold = sliced_download_threshold
+        self.sliced_download_max_slices = sliced_download_max_slices
+        self.sliced_download_min_slice_size = sliced_download_min_slice_size
+        self.build_client()
+
+    def set_credentials(self, credentials: Credentials) -> None:
+        self.credentials = credentials
+        self.build_client()
+
+    def get_project(self) -> str:
+        return str(self.client.project)
+
+    def build_client(self) -> None:
+        """Create the client, resolving default credentials through `auth_cache`.
+
+        Without explicit credentials or an auth cache, or when talking to an
+        emulator, the client resolves credentials itself.
+        """
+        if (
+            self.credentials is not None
+            or self.auth_cache is None
+            or os.environ.get("STORAGE_EMULATOR_HOST")
+        ):
+            self.client = Client(credentials=self.credentials)
+        else:
+            credentials, project = default_credentials(self.auth_cache)
+            if project:
+                self.client = Client(project=project, credentials=credentials)
+            else:
+                self.client = Client(credentials=credentials)
+        self._thread_clients = threading.local()
+        self._slice_pool: Optional[ThreadPoolExecutor] = None
+        self._slice_pool_lock = threading.Lock()
+
+    def _thread_client(self) -> Client:
+        """Return a client owned by the calling thread.
+
+        Batches are tracked on a per-client stack, so concurrent batches must not
+        share a client. The thread clients reuse the main client's credentials
+        and project to avoid running credential discovery again. Threads that
+        live on, like the slice pool's, keep their client and its connections.
+        """
+        client: Optional[Client] = getattr(self._thread_clients, "client", None)
+        if client is None:
+            client = Client(
+                project=self.client.project,
+                credentials=self.client._credentials,
+            )
+            self._thread_clients.client = client
+        return client
+
+    def list_buckets(self) -> List[BucketWithPrefix]:
+        with metrics.timed("storage.list_buckets"):
+            buckets = self.client.list_buckets(fields="items(name),nextPageToken")
+            return [BucketWithPrefix(bucket.name, []) for bucket in buckets]
+
+    def _list_object_pages(
+        self,
+        bucket_name: str,
+        *,
+        prefix: str,
+        fields: Sequence[str],
+        delimiter: Optional[str] = None,
+        start_offset: Optional[str] = None,
+        end_offset: Optional[str] = None,
+        match_glob: Optional[str] = None,
+        raw_items: bool = False,
+    ) -> Iterator[Any]:
+        """Iterate raw listing pages with a field mask, skipping `Blob` objects.
+
+        Items are turned straight into `BucketWithPrefix` (or left as the JSON
+        dicts with `raw_items`), and each page carries the `prefixes` of its
+        response like `Bucket.list_blobs` does. Every page request is timed in
+        `storage.list_page`.
+        """
+        extra_params: dict[str, Any] = {
+            "projection": "noAcl",
+            "prefix": prefix,
+            "fields": f"items({','.join(fields)}),prefixes,nextPageToken",
+        }
+        if delimiter is not None:
+            extra_params["delimiter"] = delimiter
+        if start_offset is not None:
+            extra_params["startOffset"] = start_offset
+        if end_offset is not None:
+            extra_params["endOffset"] = end_offset
+        if match_glob is not None:
+            extra_params["matchGlob"] = glob_under_prefix(prefix, match_glob)
+
+        # Skip the timestamp entirely when the field mask leaves it out.
+        parse_updated = "updated" in fields
+
+        def _item_to_entry(_: Any, item: dict[str, Any]) -> BucketWithPrefix:
+            size = item.get("size")
+            updated = item.get("updated") if parse_updated else None
+            generation = item.get("generation")
+            return BucketWithPrefix.from_full_prefix(
+                bucket_name=bucket_name,
+                full_prefix=item["name"],
+                is_blob=True,
+                size=int(size) if size is not None else None,
+                updated_at=rfc3339_to_datetime(updated) if updated else None,
+                generation=int(generation) if generation is not None else None,
+                crc32c=item.get("crc32c"),
+            )
+
+        iterator = self.client._list_resource(
+            f"/b/{bucket_name}/o",
+            _raw_item if raw_items else _item_to_entry,
+            extra_params=extra_params,
+            page_start=_blobs_page_start,
+        )
+        iterator.prefixes = set()
+        return metrics.timed_iter("storage.list_page", iterator.pages)
+
+    def list_prefix_pages(
+        self, uri: BucketWithPrefix, *, match_glob: Optional[str] = None
+    ) -> Iterator[ColumnarListing]:
+        bucket_name = uri.bucket_name
+        pages = self._list_object_pages(
+            bucket_name,
+            prefix=uri.full_prefix,
+            fields=LISTING_FIELDS,
+            delimiter="/",
+            match_glob=match_glob,
+            raw_items=True,
+        )
+
+        # GCS returns names in lexicographic order across pages, so sorting each
+        # page on its own keeps the concatenated listing sorted.
+        # A placeholder object named exactly like the folder is not a child, so
+        # skip it.
+        placeholder = uri.full_prefix.rstrip("/")
+        seen_prefixes: set[str] = set()
+        for page in pages:
+            listing = ColumnarListing()
+            for subdir in page.prefixes:
+                if subdir not in seen_prefixes:
+                    seen_prefixes.add(subdir)
+                    listing.append_object(bucket_name, subdir)
+            for item in page:
+                name = item["name"]
+                if name.rstrip("/") == placeholder:
+                    continue
+                size = item.get("size")
+                updated = item.get("updated")
+                generation = item.get("generation")
+                listing.append_object(
+                    bucket_name,
+                    name,
+                    is_blob=True,
+                    size=int(size) if size is not None else None,
+                    updated_ns=rfc3339_to_epoch_ns(updated) if updated else None,
+                    generation=int(generation) if generation is not None else None,
+                )
+            yield listing.sorted_by("name")
+
+    def list_all_blobs_pages(
+        self,
+        uri: BucketWithPrefix,
+        fields: Sequence[str] = ALL_FIELDS,
+        *,
+        start_offset: Optional[str] = None,
+        end_offset: Optional[str] = None,
+        match_glob: Optional[str] = None,
+    ) -> Iterator[List[BucketWithPrefix]]:
+        for page in self._list_object_pages(
+            uri.bucket_name,
+            prefix=uri.full_prefix,
+            fields=fields,
+            start_offset=start_offset,
+            end_offset=end_offset,
+            match_glob=match_glob,
+        ):
+            yield list(page)
+
+    def download_to_filename(self, uri: BucketWithPrefix, dest: str) -> None:
+        with metrics.timed("storage.download"):
+            blob = self.client.bucket(uri.bucket_name).get_blob(uri.full_prefix)
+
+            if blob is None:
+                return
+            if self._should_slice(blob):
+                metrics.counter("storage.download.sliced").inc()
+                self._sliced_download(blob, dest)
+            else:
+                blob.download_to_filename(dest)
+            metrics.counter("storage.download.bytes").inc(blob.size or 0)
+
+    def _should_slice(self, blob: Blob) -> bool:
+        """Whether `blob` is big enough for a sliced download and safe to slice.
+
+        Objects stored with `Content-Encoding: gzip` may be served transcoded, so
+        byte ranges do not map to the stored bytes; without a crc32c the
+        reassembled file could not be checked.
+        """
+        return (
+            blob.size is not None
+            and blob.size >= self.sliced_download_threshold
+            and blob.content_encoding != "gzip"
+            and blob.crc32c is not None
+        )
+
+    def _slice_executor(self) -> ThreadPoolExecutor:
+        """Return the pool that downloads slices, shared by all downloads.
+
+        Its threads outlive a single download, so each one's client (see
+        `_thread_client`) is reused instead of set up again for every slice.
+        """
+        with self._slice_pool_lock:
+            if self._slice_pool is None:
+                self._slice_pool = ThreadPoolExecutor(
+                    max_workers=max(1, self.sliced_download_max_slices),
+                    thread_name_prefix="burf-slice",
+                )
+            return self._slice_pool
+
+    def _sliced_download(self, blob: Blob, dest: str) -> None:
+        """Download a large blob as concurrent byte ranges into a preallocated file.
+
+        Every range is pinned to the generation read up front, so a concurrent
+        overwrite cannot mix two versions. The whole file is checked against the
+        object's crc32c at the end.
+        """
+        size = int(blob.size)
+        slices = max(
+            1,
+            min(
+                self.sliced_download_max_slices,
+                math.ceil(size / max(1, self.sliced_download_min_slice_size)),
+            ),
+        )
+        slice_size = math.ceil(size / slices)
+
+        with open(dest, "wb") as f:
+            f.truncate(size)
+
+        def _download_range(start: int) -> None:
+            end = min(start + slice_size, size) - 1
+            client = self._thread_client()
+            part = client.bucket(blob.bucket.name).blob(
+                blob.name, generation=blob.generation
+            )
+            with open(dest, "r+b") as f:
+                f.seek(start)
+                # Ranged reads cannot be validated on their own; see the crc32c check.
+                part.download_to_file(f, start=start, end=end, checksum=None)
+
+        try:
+            pool = self._slice_executor()
+            futures = [
+                pool.submit(_download_range, start)
+                for start in range(0, size, slice_size)
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            finally:
+                # Don't leave slices running (or queued) once one has failed.
+                for future in futures:
+                    future.cancel()
+                wait(futures)
+
+            if blob.crc32c is not None and file_crc32c(dest) != blob.crc32c:
+                raise ValueError(
+                    f"crc32c mismatch after downloading gs://{blob.bucket.name}/{blob.name}"
+                )
+        except BaseException:
+            os.remove(dest)
+            raise
+
+    def delete_blob(self, uri: BucketWithPrefix) -> None:
+        if not uri.bucket_name or not uri.is_blob:
+            raise ValueError("delete_blob expects a blob URI with a bucket name")
+
+        blob = self.client.bucket(uri.bucket_name).blob(uri.full_prefix)
+        try:
+            blob.delete()
+        except NotFound:
+            # Best-effort: object may have been removed already.
+            return
+
+    def delete_blobs(
+        self,
+        uris: Iterable[BucketWithPrefix],
+        on_result: Optional[OnDeleteResult] = None,
+    ) -> None:
+        """Delete objects with batch requests, running several batches at once."""
+        workers = max(1, self.max_concurrent_delete_batches)
+        slots = threading.BoundedSemaphore(workers * 2)
+        errors: list[BaseException] = []
+
+        def _release(future: Future[None]) -> None:
+            exc = future.exception() if not future.cancelled() else None
+            if exc is not None:
+                errors.append(exc)
+            slots.release()
+
+        def _run_batch(chunk: List[BucketWithPrefix]) -> None:
+            for result in self._delete_batch(chunk):
+                if on_result is not None:
+                    on_result(result)
+
+        iterator = iter(uris)
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="burf-delete"
+        ) as pool:
+            while not errors:
+                taken = list(itertools.islice(iterator, self.DELETE_BATCH_SIZE))
+                if not taken:
+                    break
+                chunk = []
+                for uri in taken:
+                    if uri.bucket_name and uri.is_blob:
+                        chunk.append(uri)
+                    elif on_result is not None:
+                        # Reported like any other per-object failure.
+                        on_result(
+                            DeleteResult(
+                                uri,
+                                error=ValueError(
+                                    "delete_blobs expects blob URIs with a bucket name"
+                                ),
+                            )
+                        )
+                if not chunk:
+                    continue
+                # Validated first, so a bad URI never holds a slot.
+                slots.acquire()
+                pool.submit(_run_batch, chunk).add_done_callback(_release)
+
+        if errors:
+            raise errors[0]
+
+    def _delete_batch(self, chunk: List[BucketWithPrefix]) -> List[DeleteResult]:
+        client = self._thread_client()
+        try:
+            with metrics.timed("storage.delete_batch"):
+                with client.batch(raise_exception=False) as batch:
+                    for uri in chunk:
+                        client.bucket(uri.bucket_name).blob(uri.full_prefix).delete()
+        except Exception as e:
+            # The batch request itself failed; every object in it shares the error.
+            return [DeleteResult(uri, error=e) for uri in chunk]
+
+        results: List[DeleteResult] = []
+        for uri, response in zip(chunk, batch._responses):
+            if 200 <= response.status_code < 300:
+                results.append(DeleteResult(uri))
+            elif response.status_code == 404:
+                results.append(DeleteResult(uri, not_found=True))
+            else:
+                metrics.counter(f"storage.delete.status.{response.status_code}").inc()
+                results.append(
+                    DeleteResult(uri, error=api_exceptions.from_http_response(response))
+                )
+        return results
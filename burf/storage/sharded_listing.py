@@ -0,0 +1,265 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence
+
+from burf.storage.ds import BucketWithPrefix
+
+if TYPE_CHECKING:
+    from burf.storage.storage import Storage
+
+# Characters tried at a position of a name when cutting a key range, by the
+# kind of character found there. They are ascending and spread over the range
+# of that kind, so cuts land where names of the same shape are likely to be.
+_SPLIT_CHARS_BY_KIND = {
+    "digit": "2468",
+    "lower": "dhlpt",
+    "upper": "DHLPT",
+}
+_SPLIT_CHARS = "-0369ADHLPTX_adhlptx"
+
+
+def _split_chars_for(char: str) -> str:
+    if char.isdigit():
+        return _SPLIT_CHARS_BY_KIND["digit"]
+    if "a" <= char <= "z":
+        return _SPLIT_CHARS_BY_KIND["lower"]
+    if "A" <= char <= "Z":
+        return _SPLIT_CHARS_BY_KIND["upper"]
+    return _SPLIT_CHARS
+
+
+def split_key_range(
+    prefix: str, first_key: str, last_key: str, end: Optional[str], ways: int
+) -> list[str]:
+    """Pick up to `ways` names that cut the keys after `last_key` into ranges.
+
+    `first_key` and `last_key` bound the keys listed so far. Candidates are
+    `last_key` truncated at every depth from `prefix` down to where those two
+    keys first differ, plus one character of the same kind as the one found at
+    that depth. Cutting any deeper would give ranges smaller than what was
+    already listed. Only names inside `prefix`, after `last_key` and before
+    `end` are returned, in ascending order.
+    """
+    common = len(os.path.commonprefix([first_key, last_key]))
+    candidates = set()
+    for depth in range(len(prefix), min(common + 1, len(last_key))):
+        head = last_key[:depth]
+        for char in _split_chars_for(last_key[depth]):
+            point = head + char
+            if point > last_key and (end is None or point < end):
+                candidates.add(point)
+    points = sorted(candidates)
+    if len(points) <= ways:
+        return points
+    step = len(points) / ways
+    return [points[int(i * step)] for i in range(ways)]
+
+
+def split_remaining_range(
+    prefix: str, first_key: str, last_key: str, end: Optional[str], ways: int
+) -> list[tuple[str, Optional[str]]]:
+    """Cut the keys after `last_key` and before `end` into `(start, end)` ranges.
+
+    This is what is left of a range whose keys from `first_key` to `last_key`
+    have been listed. It is cut at the `split_key_range` points, so there is
+    one range if `ways` is 0 or no point fits, and at most `ways + 1`.
+    """
+    points = split_key_range(prefix, first_key, last_key, end, ways) if ways else []
+    # "\0" sorts first, so the rest starts right after `last_key`.
+    starts = [last_key + "\0", *points]
+    ends: list[Optional[str]] = [*points, end]
+    return list(zip(starts, ends))
+
+
+def spread(items: Sequence[str], count: int) -> list[str]:
+    """Return at most `count` of the sorted `items`, evenly spaced."""
+    items = sorted(items)
+    if len(items) <= count:
+        return items
+    step = len(items) / count
+    return [items[int(i * step)] for i in range(count)]
+
+
+@dataclass(eq=False)
+class _Shard:
+    start: Optional[str]
+    end: Optional[str]
+    pages: List[List[BucketWithPrefix]] = field(default_factory=list)
+    done: bool = False
+
+    @property
+    def sort_key(self) -> str:
+        return self.start or ""
+
+
+class ShardedBlobListing:
+    """Lists every blob under a prefix over several key ranges at once.
+
+    The key space is first cut at `seeds` (by default the folders on the first
+    page of a delimited listing of `uri`). A range that has listed
+    `pages_per_shard` pages hands the rest of its keys to narrower ranges cut
+    with `split_key_range`. Up to `max_workers` ranges are listed concurrently
+    and `pages()` yields their pages in key order, so the result is the same as
+    `Storage.list_all_blobs_pages`.
+
+    Ranges ahead of the one being consumed are only started while fewer than
+    `max_buffered_pages` pages wait to be consumed, so a slow consumer keeps
+    memory bounded.
+    """
+
+    def __init__(
+        self,
+        storage: "Storage",
+        uri: BucketWithPrefix,
+        fields: Sequence[str],
+        seeds: Optional[Sequence[str]] = None,
+        *,
+        max_workers: int = 8,
+        pages_per_shard: int = 2,
+        split_ways: int = 4,
+        max_shards: int = 64,
+        max_buffered_pages: int = 32,
+        match_glob: Optional[str] = None,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.uri = uri
+        self.fields = fields
+        self.max_workers = max_workers
+        self.pages_per_shard = max(1, pages_per_shard)
+        self.split_ways = split_ways
+        self.max_shards = max_shards
+        self.max_buffered_pages = max_buffered_pages
+        self.match_glob = match_glob
+        self._storage = storage
+        self._seeds = seeds
+        self._cond = threading.Condition()
+        # Shards not consumed yet, in key order; the first one is being consumed.
+        self._order: List[_Shard] = []
+        self._ready: List[_Shard] = []
+        self._running = 0
+        self._buffered = 0
+        # Largest start key of the shards started so far.
+        self._frontier = ""
+        self._error: Optional[BaseException] = None
+        self._stopped = False
+
+    def _discover_seeds(self) -> List[str]:
+        first_page = next(iter(self._storage.list_prefix_pages(self.uri)), [])
+        return [entry.full_prefix for entry in first_page if not entry.is_blob]
+
+    def pages(self) -> Iterator[List[BucketWithPrefix]]:
+        seeds = self._seeds if self._seeds is not None else self._discover_seeds()
+        seeds = spread(
+            [seed for seed in seeds if seed > self.uri.full_prefix],
+            self.max_shards,
+        )
+        bounds: List[Optional[str]] = [None, *seeds, None]
+        shards = [_Shard(start, end) for start, end in zip(bounds, bounds[1:])]
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="burf-list"
+        )
+        with self._cond:
+            self._order = list(shards)
+            self._ready = list(shards)
+            self._schedule(executor)
+        try:
+            while True:
+                with self._cond:
+                    while True:
+                        if self._error is not None:
+                            raise self._error
+                        if not self._order:
+                            return
+                        head = self._order[0]
+                        if head.pages or head.done:
+                            break
+                        self._cond.wait()
+                    if head.pages:
+                        page = head.pages.pop(0)
+                        self._buffered -= 1
+                    else:
+                        page = None
+                        self._order.pop(0)
+                    self._schedule(executor)
+                if page:
+                    yield page
+        finally:
+            with self._cond:
+                self._stopped = True
+                self._ready.clear()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _schedule(self, executor: ThreadPoolExecutor) -> None:
+        """Start ready shards, earliest first, while workers and buffer allow.
+
+        Must be called with `_cond` held. Shards before the furthest one started
+        are consumed before anything it buffers, so they are started even when the
+        buffer is full; this also guarantees the consumer can make progress.
+        """
+        while self._ready and self._running < self.max_workers:
+            shard = min(self._ready, key=lambda s: s.sort_key)
+            buffer_full = self._buffered >= self.max_buffered_pages
+            if buffer_full and shard.sort_key > self._frontier:
+                return
+            self._ready.remove(shard)
+            self._frontier = max(self._frontier, shard.sort_key)
+            self._running += 1
+            executor.submit(self._list_shard, shard, executor)
+
+    def _list_shard(self, shard: _Shard, executor: ThreadPoolExecutor) -> None:
+        rest: List[_Shard] = []
+        try:
+            pages = self._storage.list_all_blobs_pages(
+                self.uri,
+                self.fields,
+                start_offset=shard.start,
+                end_offset=shard.end,
+                match_glob=self.match_glob,
+            )
+            first_key: Optional[str] = None
+            for page_number, page in enumerate(pages, start=1):
+                if self._stopped:
+                    return
+                with self._cond:
+                    shard.pages.append(page)
+                    self._buffered += 1
+                    self._cond.notify_all()
+                if not page:
+                    continue
+                if first_key is None:
+                    first_key = page[0].full_prefix
+                if page_number < self.pages_per_shard:
+                    continue
+                # This range is big: stop here and let narrower ranges list the
+                # rest of it concurrently.
+                with self._cond:
+                    can_split = len(self._order) < self.max_shards
+                rest = [
+                    _Shard(start, end)
+                    for start, end in split_remaining_range(
+                        self.uri.full_prefix,
+                        first_key,
+                        page[-1].full_prefix,
+                        shard.end,
+                        self.split_ways if can_split else 0,
+                    )
+                ]
+                return
+        except BaseException as e:
+            with self._cond:
+                if self._error is None:
+                    self._error = e
+        finally:
+            with self._cond:
+                self._running -= 1
+                if not self._stopped and self._error is None:
+                    # A shard stays in `_order` until it is done and consumed.
+                    position = self._order.index(shard) + 1
+                    self._order[position:position] = rest
+                    self._ready.extend(rest)
+                    shard.done = True
+                    self._schedule(executor)
+                self._cond.notify_all()
@@ -1,26 +1,135 @@
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence
 
-from google.api_core.exceptions import NotFound
-from google.auth.credentials import Credentials
-from google.cloud.storage import Client  # type: ignore
+from burf.storage.ds import BucketWithPrefix, ColumnarListing
+from burf.storage.sharded_listing import ShardedBlobListing
 
-from burf.storage.ds import BucketWithPrefix
+
+# Object fields that listing callers can ask for. Backends may skip everything
+# else, so a caller only pays for the metadata it uses.
+LISTING_FIELDS: tuple[str, ...] = ("name", "size", "updated", "generation")
+TRANSFER_FIELDS: tuple[str, ...] = ("name", "size", "generation", "crc32c")
+NAME_FIELDS: tuple[str, ...] = ("name",)
+SIZE_FIELDS: tuple[str, ...] = ("name", "size")
+ALL_FIELDS: tuple[str, ...] = ("name", "size", "updated", "generation", "crc32c")
+
+
+def __getattr__(name: str) -> Any:
+    # GCS used to live here; it moved to burf.storage.gcs so that importing this
+    # module does not load the cloud SDK.
+    if name in ("GCS", "glob_under_prefix"):
+        from burf.storage import gcs
+
+        return getattr(gcs, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@dataclass(frozen=True)
+class DeleteResult:
+    """Outcome of deleting one object through `Storage.delete_blobs`."""
+
+    uri: BucketWithPrefix
+    error: Optional[BaseException] = None
+    not_found: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+OnDeleteResult = Callable[[DeleteResult], Any]
 
 
 class Storage(ABC):
+    @property
+    def ready(self) -> bool:
+        """False while the backend is still being set up and calls would block."""
+        return True
+
+    @property
+    def setup_error(self) -> Optional[BaseException]:
+        """The error that made setting up the backend fail, if any."""
+        return None
+
     @abstractmethod
     def list_buckets(self) -> List[BucketWithPrefix]:
         pass
 
     @abstractmethod
-    def list_prefix(self, uri: BucketWithPrefix) -> List[BucketWithPrefix]:
+    def list_prefix_pages(
+        self, uri: BucketWithPrefix, *, match_glob: Optional[str] = None
+    ) -> Iterator[Sequence[BucketWithPrefix]]:
+        """Yield the listing of `uri` one page at a time, as pages arrive.
+
+        Each page is sorted by `full_prefix` and pages come in ascending order,
+        so concatenating them gives the same result as `list_prefix`. Pages may
+        be plain lists or `ColumnarListing`s. With `match_glob`, only the
+        objects whose name relative to `uri` matches it are listed, filtered by
+        the server.
+        """
         pass
 
+    def list_prefix(
+        self, uri: BucketWithPrefix, *, match_glob: Optional[str] = None
+    ) -> ColumnarListing:
+        return ColumnarListing.concat(
+            self.list_prefix_pages(uri, match_glob=match_glob)
+        )
+
     @abstractmethod
-    def list_all_blobs(self, uri: BucketWithPrefix) -> List[BucketWithPrefix]:
+    def list_all_blobs_pages(
+        self,
+        uri: BucketWithPrefix,
+        fields: Sequence[str] = ALL_FIELDS,
+        *,
+        start_offset: Optional[str] = None,
+        end_offset: Optional[str] = None,
+        match_glob: Optional[str] = None,
+    ) -> Iterator[List[BucketWithPrefix]]:
+        """Yield every blob under `uri`, recursively, one page at a time.
+
+        Only the metadata named in `fields` is guaranteed to be filled in.
+        `start_offset` (inclusive) and `end_offset` (exclusive) restrict the
+        object names listed to a key range, and `match_glob` to the names
+        matching it relative to `uri`.
+        """
         pass
 
+    def list_all_blobs_pages_parallel(
+        self,
+        uri: BucketWithPrefix,
+        fields: Sequence[str] = ALL_FIELDS,
+        *,
+        max_workers: int = 8,
+        match_glob: Optional[str] = None,
+    ) -> Iterator[List[BucketWithPrefix]]:
+        """Like `list_all_blobs_pages`, but lists key ranges concurrently.
+
+        Pages still come in key order; see `ShardedBlobListing`.
+        """
+        return ShardedBlobListing(
+            self, uri, fields, max_workers=max_workers, match_glob=match_glob
+        ).pages()
+
+    def list_all_blobs(
+        self,
+        uri: BucketWithPrefix,
+        fields: Sequence[str] = ALL_FIELDS,
+        *,
+        max_workers: int = 1,
+        match_glob: Optional[str] = None,
+    ) -> List[BucketWithPrefix]:
+        pages = (
+            self.list_all_blobs_pages_parallel(
+                uri, fields, max_workers=max_workers, match_glob=match_glob
+            )
+            if max_workers > 1
+            else self.list_all_blobs_pages(uri, fields, match_glob=match_glob)
+        )
+        return [blob for page in pages for blob in page]
+
     @abstractmethod
     def get_project(self) -> str:
         pass
@@ -34,83 +143,115 @@ class Storage(ABC):
         """Delete a single blob object."""
         pass
 
+    def delete_blobs(
+        self,
+        uris: Iterable[BucketWithPrefix],
+        on_result: Optional[OnDeleteResult] = None,
+    ) -> None:
+        """Delete many blob objects, reporting one `DeleteResult` per object.
 
-class GCS(Storage):
-    credentials: Optional[Credentials]
-    client: Client
+        `uris` is consumed lazily, so callers can stop early by ending the iterable.
+        Backends should override this with a bulk implementation; the default
+        deletes one object at a time.
+        """
+        for uri in uris:
+            try:
+                self.delete_blob(uri)
+                result = DeleteResult(uri)
+            except Exception as e:
+                result = DeleteResult(uri, error=e)
+            if on_result is not None:
+                on_result(result)
 
-    def __init__(self, credentials: Optional[Credentials] = None):
-        self.credentials = credentials
-        self.build_client()
 
-    def set_credentials(self, credentials: Credentials) -> None:
-        self.credentials = credentials
-        self.build_client()
+class DeferredStorage(Storage):
+    """A `Storage` whose backend is created on a background thread.
 
-    def get_project(self) -> str:
-        return str(self.client.project)
+    Creating a backend can mean importing a cloud SDK and discovering
+    credentials, which may probe a metadata server; deferring it lets the UI
+    draw meanwhile. `start()` begins creating it, and every call waits until
+    it exists. If `factory` failed, calls raise its error.
+    """
+
+    def __init__(self, factory: Callable[[], Storage]) -> None:
+        self._factory = factory
+        self._created = threading.Event()
+        self._start_lock = threading.Lock()
+        self._started = False
+        self._backend: Optional[Storage] = None
+        self._error: Optional[BaseException] = None
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(
+            target=self._create, name="burf-storage-setup", daemon=True
+        ).start()
+
+    def _create(self) -> None:
+        try:
+            self._backend = self._factory()
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._created.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._created.is_set()
 
-    def build_client(self) -> None:
-        self.client = Client(credentials=self.credentials)
+    @property
+    def setup_error(self) -> Optional[BaseException]:
+        return self._error if self.ready else None
+
+    @property
+    def backend(self) -> Storage:
+        self.start()
+        self._created.wait()
+        if self._error is not None:
+            raise self._error
+        assert self._backend is not None
+        return self._backend
 
     def list_buckets(self) -> List[BucketWithPrefix]:
-        buckets = self.client.list_buckets()
-        return [BucketWithPrefix(bucket.name, []) for bucket in buckets]
+        return self.backend.list_buckets()
 
-    def list_prefix(self, uri: BucketWithPrefix) -> List[BucketWithPrefix]:
-        blobs = self.client.bucket(uri.bucket_name).list_blobs(
-            delimiter="/", prefix=uri.full_prefix
-        )
+    def list_prefix_pages(
+        self, uri: BucketWithPrefix, *, match_glob: Optional[str] = None
+    ) -> Iterator[Sequence[BucketWithPrefix]]:
+        return self.backend.list_prefix_pages(uri, match_glob=match_glob)
 
-        blob_list = [blob for blob in list(blobs) if blob.name != uri.full_prefix]
-
-        return sorted(
-            [
-                BucketWithPrefix.from_full_prefix(
-                    bucket_name=uri.bucket_name,
-                    full_prefix=subdir,
-                )
-                for subdir in blobs.prefixes
-            ]
-            + [
-                BucketWithPrefix.from_full_prefix(
-                    bucket_name=blob.bucket.name,
-                    full_prefix=blob.name,
-                    is_blob=True,
-                    size=blob.size,
-                    updated_at=blob.updated,
-                )
-                for blob in blob_list
-            ],
-            key=lambda x: x.full_prefix,
+    def list_all_blobs_pages(
+        self,
+        uri: BucketWithPrefix,
+        fields: Sequence[str] = ALL_FIELDS,
+        *,
+        start_offset: Optional[str] = None,
+        end_offset: Optional[str] = None,
+        match_glob: Optional[str] = None,
+    ) -> Iterator[List[BucketWithPrefix]]:
+        return self.backend.list_all_blobs_pages(
+            uri,
+            fields,
+            start_offset=start_offset,
+            end_offset=end_offset,
+            match_glob=match_glob,
         )
 
-    def list_all_blobs(self, uri: BucketWithPrefix) -> List[BucketWithPrefix]:
-        blobs = self.client.bucket(uri.bucket_name).list_blobs(prefix=uri.full_prefix)
-        return [
-            BucketWithPrefix.from_full_prefix(
-                bucket_name=blob.bucket.name,
-                full_prefix=blob.name,
-                is_blob=True,
-                size=blob.size,
-                updated_at=blob.updated,
-            )
-            for blob in blobs
-        ]
+    def get_project(self) -> str:
+        return self.backend.get_project()
 
     def download_to_filename(self, uri: BucketWithPrefix, dest: str) -> None:
-        blob = self.client.bucket(uri.bucket_name).blob(uri.full_prefix)
-
-        if blob.exists():
-            blob.download_to_filename(dest)
+        self.backend.download_to_filename(uri, dest)
 
     def delete_blob(self, uri: BucketWithPrefix) -> None:
-        if not uri.bucket_name or not uri.is_blob:
-            raise ValueError("delete_blob expects a blob URI with a bucket name")
+        self.backend.delete_blob(uri)
 
-        blob = self.client.bucket(uri.bucket_name).blob(uri.full_prefix)
-        try:
-            blob.delete()
-        except NotFound:
-            # Best-effort: object may have been removed already.
-            return
+    def delete_blobs(
+        self,
+        uris: Iterable[BucketWithPrefix],
+        on_result: Optional[OnDeleteResult] = None,
+    ) -> None:
+        self.backend.delete_blobs(uris, on_result)
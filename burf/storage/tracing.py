@@ -0,0 +1,208 @@
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, TypeVar
+
+from burf.storage.ds import BucketWithPrefix
+from burf.storage.storage import ALL_FIELDS, DeleteResult, OnDeleteResult, Storage
+
+T = TypeVar("T", bound=Sequence[Any])
+
+
+class TraceRecorder:
+    """Collects timed spans as Chrome trace events.
+
+    `dump()` writes the Trace Event Format JSON that chrome://tracing and
+    https://ui.perfetto.dev open, with one track per thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._events: list[dict[str, Any]] = []
+        self._thread_names: dict[int, str] = {}
+        # Thread idents are reused once a thread exits, so number threads here.
+        self._next_tid = itertools.count(1)
+        self._local = threading.local()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    def _tid(self) -> int:
+        tid: Optional[int] = getattr(self._local, "tid", None)
+        if tid is None:
+            tid = self._local.tid = next(self._next_tid)
+            with self._lock:
+                self._thread_names[tid] = threading.current_thread().name
+        return tid
+
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self._origin) * 1e6
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[dict[str, Any]]:
+        """Record the enclosed block as the event `name`.
+
+        The yielded dict becomes the event's arguments, so the block can add
+        what it learned, e.g. the size of a result. A failing block records
+        its error.
+        """
+        tid = self._tid()
+        start = self._now_us()
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            event = {
+                "name": name,
+                "cat": "storage",
+                "ph": "X",
+                "ts": start,
+                "dur": self._now_us() - start,
+                "pid": self._pid,
+                "tid": tid,
+                "args": args,
+            }
+            with self._lock:
+                self._events.append(event)
+
+    def dump(self, path: str) -> None:
+        with self._lock:
+            events = list(self._events)
+            thread_names = dict(self._thread_names)
+        metadata = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self._pid,
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for tid, name in thread_names.items()
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"traceEvents": metadata + events, "displayTimeUnit": "ms"},
+                f,
+                default=str,
+            )
+
+
+class TracingStorage(Storage):
+    """Records every call to `backend`, with its arguments and result size.
+
+    Listings are recorded per page, as the time spent fetching each one, so
+    the time callers spend between pages is not counted.
+    """
+
+    def __init__(self, backend: Storage, recorder: TraceRecorder) -> None:
+        self._backend = backend
+        self._recorder = recorder
+
+    @property
+    def ready(self) -> bool:
+        return self._backend.ready
+
+    @property
+    def setup_error(self) -> Optional[BaseException]:
+        return self._backend.setup_error
+
+    def _traced_pages(
+        self, name: str, pages: Iterable[T], **args: Any
+    ) -> Iterator[T]:
+        iterator = iter(pages)
+        for page_number in itertools.count(1):
+            with self._recorder.span(name, page=page_number, **args) as span_args:
+                try:
+                    page = next(iterator)
+                except StopIteration:
+                    span_args["end"] = True
+                    return
+                span_args["entries"] = len(page)
+            yield page
+
+    def list_buckets(self) -> List[BucketWithPrefix]:
+        with self._recorder.span("list_buckets") as args:
+            buckets = self._backend.list_buckets()
+            args["entries"] = len(buckets)
+        return buckets
+
+    def list_prefix_pages(
+        self, uri: BucketWithPrefix, *, match_glob: Optional[str] = None
+    ) -> Iterator[Sequence[BucketWithPrefix]]:
+        return self._traced_pages(
+            "list_prefix_pages",
+            self._backend.list_prefix_pages(uri, match_glob=match_glob),
+            uri=uri.full_path,
+            match_glob=match_glob,
+        )
+
+    def list_all_blobs_pages(
+        self,
+        uri: BucketWithPrefix,
+        fields: Sequence[str] = ALL_FIELDS,
+        *,
+        start_offset: Optional[str] = None,
+        end_offset: Optional[str] = None,
+        match_glob: Optional[str] = None,
+    ) -> Iterator[List[BucketWithPrefix]]:
+        return self._traced_pages(
+            "list_all_blobs_pages",
+            self._backend.list_all_blobs_pages(
+                uri,
+                fields,
+                start_offset=start_offset,
+                end_offset=end_offset,
+                match_glob=match_glob,
+            ),
+            uri=uri.full_path,
+            fields=list(fields),
+            start_offset=start_offset,
+            end_offset=end_offset,
+            match_glob=match_glob,
+        )
+
+    def get_project(self) -> str:
+        with self._recorder.span("get_project"):
+            return self._backend.get_project()
+
+    def download_to_filename(self, uri: BucketWithPrefix, dest: str) -> None:
+        with self._recorder.span(
+            "download_to_filename", uri=uri.full_path, dest=dest
+        ) as args:
+            self._backend.download_to_filename(uri, dest)
+            if os.path.exists(dest):
+                args["bytes"] = os.path.getsize(dest)
+
+    def delete_blob(self, uri: BucketWithPrefix) -> None:
+        with self._recorder.span("delete_blob", uri=uri.full_path):
+            self._backend.delete_blob(uri)
+
+    def delete_blobs(
+        self,
+        uris: Iterable[BucketWithPrefix],
+        on_result: Optional[OnDeleteResult] = None,
+    ) -> None:
+        counts = {"deleted": 0, "not_found": 0, "failed": 0}
+        counts_lock = threading.Lock()
+
+        def _count(result: DeleteResult) -> None:
+            if result.not_found:
+                outcome = "not_found"
+            elif not result.ok:
+                outcome = "failed"
+            else:
+                outcome = "deleted"
+            with counts_lock:
+                counts[outcome] += 1
+            if on_result is not None:
+                on_result(result)
+
+        with self._recorder.span("delete_blobs") as args:
+            try:
+                self._backend.delete_blobs(uris, _count)
+            finally:
+                args.update(counts)
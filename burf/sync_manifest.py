@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Optional
+
+from burf.storage.ds import BucketWithPrefix
+from burf.util import file_crc32c
+
+MANIFEST_NAME = ".burf-manifest.json"
+_MANIFEST_VERSION = 1
+
+
+class SyncManifest:
+    """Sidecar file recording which object version each local file came from.
+
+    Entries are keyed by the path relative to the download root and store the
+    object's size, generation and crc32c plus the local file's mtime, so an
+    unchanged file can be recognised without reading it again.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.path = os.path.join(root, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._dirty = False
+
+    def load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == _MANIFEST_VERSION:
+            entries = data.get("objects")
+            if isinstance(entries, dict):
+                with self._lock:
+                    self._entries = entries
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": _MANIFEST_VERSION, "objects": dict(self._entries)}
+            self._dirty = False
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def record(self, rel_path: str, blob: BucketWithPrefix, local_path: str) -> None:
+        try:
+            mtime_ns = os.stat(local_path).st_mtime_ns
+        except OSError:
+            return
+        entry = {
+            "size": blob.size,
+            "generation": blob.generation,
+            "crc32c": blob.crc32c,
+            "mtime_ns": mtime_ns,
+        }
+        with self._lock:
+            self._entries[rel_path] = entry
+            self._dirty = True
+
+    def is_unchanged(
+        self, rel_path: str, blob: BucketWithPrefix, local_path: str
+    ) -> bool:
+        """Return True if `local_path` already holds the listed object version.
+
+        Size must match. Then a manifest entry for the same generation whose
+        mtime still matches is trusted. Otherwise the local crc32c is compared
+        with the object's and, on a match, the entry is refreshed.
+        """
+        try:
+            stat = os.stat(local_path)
+        except OSError:
+            return False
+        if blob.size is None or stat.st_size != blob.size:
+            return False
+
+        with self._lock:
+            entry: Optional[dict[str, Any]] = self._entries.get(rel_path)
+        if (
+            entry is not None
+            and entry.get("size") == blob.size
+            and entry.get("mtime_ns") == stat.st_mtime_ns
+            and blob.generation is not None
+            and entry.get("generation") == blob.generation
+        ):
+            return True
+
+        if blob.crc32c is None or file_crc32c(local_path) != blob.crc32c:
+            return False
+        self.record(rel_path, blob, local_path)
+        return True
@@ -1,7 +1,13 @@
+import base64
+import heapq
+import itertools
 import math
 import re
+import threading
+import time
 from collections import OrderedDict
-from typing import Any, Generic, TypeVar
+from dataclasses import dataclass
+from typing import Callable, Generic, Optional, TypeVar
 
 from burf.storage.ds import BucketWithPrefix
 
@@ -18,6 +24,18 @@ def human_readable_bytes(size_in_bytes: int) -> str:
     return f"{size} {size_name[idx]}"
 
 
+def file_crc32c(path: str, chunk_size: int = 8 * 1024 * 1024) -> str:
+    """Return the base64 encoded CRC32C of a local file, as GCS reports it."""
+    # Imported here: burf.util is loaded at startup and crc32c is rarely needed.
+    import google_crc32c
+
+    checksum = google_crc32c.Checksum()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            checksum.update(chunk)
+    return base64.b64encode(checksum.digest()).decode("ascii")
+
+
 def get_gcs_bucket_and_prefix(gcs_uri: str) -> BucketWithPrefix:
     match = re.match(r"(gs://)?(?P<bucket>[^/]+)/*(?P<prefix>.*)", gcs_uri)
     if match:
@@ -34,12 +52,177 @@ K = TypeVar("K")
 V = TypeVar("V")
 
 
-class RecentDict(OrderedDict[K, V], Generic[K, V]):
-    def __init__(self, max_elements: int, *args: Any, **kwargs: Any) -> None:
-        self.max_elements = max_elements
-        super().__init__(*args, **kwargs)
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    entries: int
+    bytes: int
+
+
+@dataclass
+class _CacheItem(Generic[V]):
+    value: V
+    size: int
+    expires_at: Optional[float]
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe least-recently-used cache bounded by entries and bytes.
+
+    `sizeof` estimates the bytes an entry holds (1 per entry by default). Entries
+    may expire after `ttl` seconds; `put` can override the TTL per entry. An
+    entry larger than the whole byte budget is not stored at all.
+
+    Expiry is checked when an entry is read. Entries with a TTL also go on a
+    heap ordered by expiry time, so `put` can drop the expired ones before
+    evicting live ones, without scanning the whole cache.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        sizeof: Optional[Callable[[V], int]] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sizeof = sizeof
+        self._items: OrderedDict[K, _CacheItem[V]] = OrderedDict()
+        # (expires_at, tie-breaker, key); may hold entries already removed or replaced.
+        self._expiry: list[tuple[float, int, K]] = []
+        self._expiry_seq = itertools.count()
+        self._lock = threading.RLock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            item = self._items.get(key)  # type: ignore[call-overload]
+            return item is not None and not self._expired(item, time.monotonic())
+
+    @staticmethod
+    def _expired(item: _CacheItem[V], now: float) -> bool:
+        return item.expires_at is not None and item.expires_at <= now
+
+    def _remove(self, key: K) -> None:
+        item = self._items.pop(key)
+        self._bytes -= item.size
+
+    def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self._misses += 1
+                return default
+            if self._expired(item, time.monotonic()):
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return default
+            self._items.move_to_end(key)
+            self._hits += 1
+            return item.value
+
+    def peek(self, key: K) -> Optional[V]:
+        """Like `get`, but without touching recency or the hit/miss counters."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or self._expired(item, time.monotonic()):
+                return None
+            return item.value
+
+    def put(self, key: K, value: V, *, ttl: Optional[float] = None) -> None:
+        size = self._sizeof(value) if self._sizeof is not None else 1
+        ttl = ttl if ttl is not None else self.ttl
+        now = time.monotonic()
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            item = _CacheItem(
+                value=value,
+                size=size,
+                expires_at=now + ttl if ttl is not None else None,
+            )
+            self._items[key] = item
+            self._bytes += size
+            if item.expires_at is not None:
+                heapq.heappush(
+                    self._expiry, (item.expires_at, next(self._expiry_seq), key)
+                )
+            self._evict(now)
+
+    __setitem__ = put
+
+    def _purge_expired(self, now: float) -> None:
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            expires_at, _, key = heapq.heappop(expiry)
+            item = self._items.get(key)
+            if item is not None and item.expires_at == expires_at:
+                self._remove(key)
+                self._expirations += 1
+        if len(expiry) > 2 * len(self._items) + 64:
+            # Drop the entries of keys that were removed or replaced since.
+            self._expiry = [
+                entry
+                for entry in expiry
+                if (item := self._items.get(entry[2])) is not None
+                and item.expires_at == entry[0]
+            ]
+            heapq.heapify(self._expiry)
+
+    def _evict(self, now: float) -> None:
+        if self._expiry:
+            self._purge_expired(now)
+        while self._items and (
+            (self.max_entries is not None and len(self._items) > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, item = self._items.popitem(last=False)
+            self._bytes -= item.size
+            self._evictions += 1
+
+    def keys(self) -> list[K]:
+        """Return a snapshot of the keys, least recently used first."""
+        with self._lock:
+            return list(self._items)
+
+    def pop(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return default
+            self._remove(key)
+            return item.value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._expiry.clear()
+            self._bytes = 0
 
-    def __setitem__(self, key: K, value: V) -> None:
-        if len(self) >= self.max_elements:
-            self.popitem(last=False)
-        super().__setitem__(key, value)
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                entries=len(self._items),
+                bytes=self._bytes,
+            )
@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from burf.storage.ds import rfc3339_to_datetime, rfc3339_to_epoch_ns, to_epoch_ns
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("2024-05-01T12:34:56.123Z", datetime(2024, 5, 1, 12, 34, 56, 123000)),
+        ("2024-05-01T12:34:56Z", datetime(2024, 5, 1, 12, 34, 56)),
+        ("2024-05-01T12:34:56.123456789Z", datetime(2024, 5, 1, 12, 34, 56, 123456)),
+        ("2024-05-01T12:34:56.1Z", datetime(2024, 5, 1, 12, 34, 56, 100000)),
+        ("2024-03-01T00:30:00.000+01:00", datetime(2024, 2, 29, 23, 30)),
+        ("1969-12-31T23:59:59.999Z", datetime(1969, 12, 31, 23, 59, 59, 999000)),
+    ],
+)
+def test_rfc3339(value: str, expected: datetime) -> None:
+    expected = expected.replace(tzinfo=timezone.utc)
+    assert rfc3339_to_datetime(value) == expected
+    assert rfc3339_to_epoch_ns(value) == to_epoch_ns(expected)
@@ -0,0 +1,119 @@
+import threading
+from typing import Any, Optional
+from unittest import mock
+
+import pytest
+
+from burf.storage.ds import BucketWithPrefix
+from burf.storage.gcs import GCS
+from burf.storage.storage import DeleteResult
+from burf.util import file_crc32c
+
+THRESHOLD = 1024
+
+
+def _gcs_with_blob(blob: Any) -> GCS:
+    gcs = GCS.__new__(GCS)
+    gcs.sliced_download_threshold = THRESHOLD
+    gcs.client = mock.Mock()
+    gcs.client.bucket.return_value.get_blob.return_value = blob
+    return gcs
+
+
+def _blob(
+    size: int, content_encoding: Optional[str] = None, crc32c: Optional[str] = "AAAAAA=="
+) -> Any:
+    return mock.Mock(size=size, content_encoding=content_encoding, crc32c=crc32c)
+
+
+@pytest.mark.parametrize(
+    "blob",
+    [
+        _blob(THRESHOLD * 4, content_encoding="gzip"),
+        _blob(THRESHOLD * 4, crc32c=None),
+        _blob(THRESHOLD - 1),
+    ],
+    ids=["gzip", "no-crc32c", "small"],
+)
+def test_download_falls_back_to_single_stream(blob: Any, tmp_path: Any) -> None:
+    gcs = _gcs_with_blob(blob)
+    dest = str(tmp_path / "object")
+    with mock.patch.object(GCS, "_sliced_download") as sliced:
+        gcs.download_to_filename(BucketWithPrefix("bucket", ["object"], is_blob=True), dest)
+    sliced.assert_not_called()
+    blob.download_to_filename.assert_called_once_with(dest)
+
+
+def test_large_plain_object_is_sliced(tmp_path: Any) -> None:
+    blob = _blob(THRESHOLD * 4)
+    gcs = _gcs_with_blob(blob)
+    dest = str(tmp_path / "object")
+    with mock.patch.object(GCS, "_sliced_download") as sliced:
+        gcs.download_to_filename(BucketWithPrefix("bucket", ["object"], is_blob=True), dest)
+    sliced.assert_called_once_with(blob, dest)
+    blob.download_to_filename.assert_not_called()
+
+
+def test_sliced_downloads_reuse_the_slice_threads_and_their_clients(
+    tmp_path: Any,
+) -> None:
+    data = bytes(range(256)) * 64
+    source = tmp_path / "source"
+    source.write_bytes(data)
+    blob = _blob(len(data), crc32c=file_crc32c(str(source)))
+    gcs = GCS.__new__(GCS)
+    gcs.client = mock.Mock()
+    gcs._thread_clients = threading.local()
+    gcs._slice_pool = None
+    gcs._slice_pool_lock = threading.Lock()
+    gcs.sliced_download_max_slices = 4
+    gcs.sliced_download_min_slice_size = 1
+    threads: list[threading.Thread] = []
+
+    def _client(*args: Any, **kwargs: Any) -> Any:
+        threads.append(threading.current_thread())
+        client = mock.Mock()
+        client.bucket.return_value.blob.return_value.download_to_file.side_effect = (
+            lambda f, start, end, checksum: f.write(data[start : end + 1])
+        )
+        return client
+
+    with mock.patch("burf.storage.gcs.Client", side_effect=_client):
+        for i in range(3):
+            dest = tmp_path / f"copy{i}"
+            gcs._sliced_download(blob, str(dest))
+            assert dest.read_bytes() == data
+
+    # One client per slice thread, not one per slice or per download.
+    assert 1 <= len(threads) <= gcs.sliced_download_max_slices
+    assert len(set(threads)) == len(threads)
+
+
+def test_delete_blobs_reports_bad_uris_without_stopping() -> None:
+    gcs = GCS.__new__(GCS)
+    gcs.max_concurrent_delete_batches = 1
+    # Enough bad batches to exhaust the slots if they were held.
+    bad = [
+        BucketWithPrefix("bucket", [f"folder{i}"])
+        for i in range(GCS.DELETE_BATCH_SIZE * 3)
+    ]
+    good = [BucketWithPrefix("bucket", ["object"], is_blob=True)]
+    results: list[DeleteResult] = []
+    with mock.patch.object(
+        GCS,
+        "_delete_batch",
+        side_effect=lambda chunk: [DeleteResult(uri) for uri in chunk],
+    ) as delete_batch:
+        gcs.delete_blobs(bad + good, results.append)
+
+    delete_batch.assert_called_once_with(good)
+    assert [result.uri for result in results if result.ok] == good
+    failed = [result for result in results if not result.ok]
+    assert [result.uri for result in failed] == bad
+    assert all(isinstance(result.error, ValueError) for result in failed)
+
+
+def test_gcs_can_still_be_imported_from_the_storage_module() -> None:
+    from burf.storage.storage import GCS as moved
+
+    assert moved is GCS
@@ -0,0 +1,194 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, List, Optional
+from unittest import mock
+
+from burf.disk_cache import DiskListingCache
+from burf.listing_service import ListingService
+from burf.storage.ds import BucketWithPrefix
+from burf.storage.storage import Storage
+
+FOLDERS = ["", "a/", "a/sub/", "other/"]
+
+
+def _one_file_per_folder(
+    uri: BucketWithPrefix, *, match_glob: Optional[str] = None
+) -> Iterator[List[BucketWithPrefix]]:
+    yield [
+        BucketWithPrefix.from_full_prefix(
+            uri.bucket_name, uri.full_prefix + "file", is_blob=True
+        )
+    ]
+
+
+def _folder(full_prefix: str) -> BucketWithPrefix:
+    return BucketWithPrefix.from_full_prefix("b", full_prefix)
+
+
+def _cached_service(tmp_path: Any) -> tuple[ListingService, DiskListingCache]:
+    disk_cache = DiskListingCache.in_dir(str(tmp_path))
+    executor = ThreadPoolExecutor(max_workers=1)
+    storage = mock.Mock(spec=Storage)
+    storage.list_prefix_pages.side_effect = _one_file_per_folder
+    service = ListingService(storage, executor=executor, disk_cache=disk_cache)
+    for full_prefix in FOLDERS:
+        service.refresh_async(
+            _folder(full_prefix), on_success=lambda elems, delta: None, supersede=False
+        )
+    executor.shutdown(wait=True)
+    return service, disk_cache
+
+
+def test_invalidate_forgets_only_listings_showing_the_deleted_folder(
+    tmp_path: Any,
+) -> None:
+    service, disk_cache = _cached_service(tmp_path)
+
+    service.invalidate(_folder("a/"))
+
+    for full_prefix, kept in [("", False), ("a/", False), ("a/sub/", False), ("other/", True)]:
+        uri = _folder(full_prefix)
+        assert (service.get_cached(uri) is not None) == kept, full_prefix
+        assert (disk_cache.load(uri.full_path) is not None) == kept, full_prefix
+
+
+def test_clear_keeps_the_disk_cache(tmp_path: Any) -> None:
+    service, disk_cache = _cached_service(tmp_path)
+
+    service.clear()
+
+    for full_prefix in FOLDERS:
+        assert disk_cache.load(_folder(full_prefix).full_path) is not None
+
+
+def test_disk_cached_listing_is_restored_on_the_worker(tmp_path: Any) -> None:
+    _, disk_cache = _cached_service(tmp_path)
+    executor = ThreadPoolExecutor(max_workers=1)
+    storage = mock.Mock(spec=Storage)
+    storage.list_prefix_pages.side_effect = _one_file_per_folder
+    service = ListingService(storage, executor=executor, disk_cache=disk_cache)
+    uri = _folder("a/")
+    restored: list[Any] = []
+    pages: list[Any] = []
+    successes: list[Any] = []
+
+    assert service.get_cached(uri) is None
+    service.refresh_async(
+        uri,
+        on_success=lambda elems, delta: successes.append(elems),
+        on_page=pages.append,
+        on_restored=restored.append,
+    )
+    executor.shutdown(wait=True)
+
+    assert [listing.paths() for listing in restored] == [["b/a/file"]]
+    # The fetched listing matches the restored one, so nothing else is delivered.
+    assert pages == [] and successes == []
+    assert service.get_cached(uri) is not None
+
+
+class _GatedPages:
+    """`list_prefix_pages` that serves each page only once the test releases it."""
+
+    def __init__(self, pages: int = 3) -> None:
+        self.pages = pages
+        self._gates: dict[str, threading.Semaphore] = {}
+        self.served: dict[str, int] = {}
+
+    def _gate(self, uri: BucketWithPrefix) -> threading.Semaphore:
+        return self._gates.setdefault(uri.full_path, threading.Semaphore(0))
+
+    def release(self, uri: BucketWithPrefix, pages: int = 1) -> None:
+        for _ in range(pages):
+            self._gate(uri).release()
+
+    def __call__(
+        self, uri: BucketWithPrefix, *, match_glob: Optional[str] = None
+    ) -> Iterator[List[BucketWithPrefix]]:
+        for i in range(self.pages):
+            assert self._gate(uri).acquire(timeout=5)
+            self.served[uri.full_path] = i + 1
+            yield [
+                BucketWithPrefix.from_full_prefix(
+                    uri.bucket_name, f"{uri.full_prefix}file{i}", is_blob=True
+                )
+            ]
+
+
+def _gated_service(
+    workers: int = 1,
+) -> tuple[ListingService, _GatedPages, mock.Mock, ThreadPoolExecutor]:
+    gated = _GatedPages()
+    storage = mock.Mock(spec=Storage)
+    storage.list_prefix_pages.side_effect = gated
+    executor = ThreadPoolExecutor(max_workers=workers)
+    return ListingService(storage, executor=executor), gated, storage, executor
+
+
+def _page_recorder() -> tuple[list[Any], threading.Event, Callable[[Any], None]]:
+    pages: list[Any] = []
+    got_page = threading.Event()
+
+    def _on_page(page: Any) -> None:
+        pages.append(page.paths())
+        got_page.set()
+
+    return pages, got_page, _on_page
+
+
+def test_refreshes_of_the_same_uri_share_one_listing() -> None:
+    service, gated, storage, executor = _gated_service()
+    uri = _folder("a/")
+    first, _, on_first = _page_recorder()
+    second, _, on_second = _page_recorder()
+
+    service.refresh_async(uri, on_success=lambda *_: None, on_page=on_first)
+    service.refresh_async(uri, on_success=lambda *_: None, on_page=on_second)
+    gated.release(uri, gated.pages)
+    executor.shutdown(wait=True)
+
+    assert storage.list_prefix_pages.call_count == 1
+    assert first == second == [[f"b/a/file{i}"] for i in range(gated.pages)]
+
+
+def test_joining_a_running_listing_replays_earlier_pages() -> None:
+    service, gated, storage, executor = _gated_service()
+    uri = _folder("a/")
+    first, first_arrived, on_first = _page_recorder()
+    second, _, on_second = _page_recorder()
+
+    service.refresh_async(uri, on_success=lambda *_: None, on_page=on_first)
+    gated.release(uri)
+    assert first_arrived.wait(5)
+    service.refresh_async(uri, on_success=lambda *_: None, on_page=on_second)
+    gated.release(uri, gated.pages - 1)
+    executor.shutdown(wait=True)
+
+    assert storage.list_prefix_pages.call_count == 1
+    assert second == first == [[f"b/a/file{i}"] for i in range(gated.pages)]
+
+
+def test_supersede_stops_a_running_listing_at_its_next_page() -> None:
+    service, gated, _, executor = _gated_service(workers=2)
+    old, new = _folder("old/"), _folder("new/")
+    old_pages, old_arrived, on_old_page = _page_recorder()
+    old_successes: list[Any] = []
+
+    service.refresh_async(
+        old,
+        on_success=lambda elems, delta: old_successes.append(elems),
+        on_page=on_old_page,
+    )
+    gated.release(old)
+    assert old_arrived.wait(5)
+    service.refresh_async(new, on_success=lambda *_: None)
+    gated.release(old, gated.pages - 1)
+    gated.release(new, gated.pages)
+    executor.shutdown(wait=True)
+
+    # The page in flight when superseded is fetched, but not delivered or cached.
+    assert gated.served["b/old/"] == 2
+    assert old_pages == [["b/old/file0"]]
+    assert old_successes == []
+    assert service.get_cached(old) is None
+    assert service.get_cached(new) is not None
@@ -0,0 +1,137 @@
+import bisect
+import itertools
+from typing import Any, Iterator, List, Optional, Sequence
+from unittest import mock
+
+import pytest
+
+from burf.du_screen import DiskUsageScanner
+from burf.storage.ds import BucketWithPrefix
+from burf.storage.sharded_listing import ShardedBlobListing, split_remaining_range
+from burf.storage.storage import NAME_FIELDS, Storage
+
+BUCKET = "b"
+PAGE_SIZE = 7
+
+
+def _names() -> list[str]:
+    names = [f"data/part-{i:05d}.parquet" for i in range(0, 400, 3)]
+    names += [
+        f"data/{folder}/f{i}" for folder in ("alpha", "beta", "Zed") for i in range(30)
+    ]
+    names += [f"data/logs/{day}/x" for day in range(1, 40)]
+    names += ["data/_SUCCESS", "data/~tilde", "other/outside"]
+    return sorted(names)
+
+
+class _PagedStorage:
+    """Lists a fixed set of object names in pages, as GCS does."""
+
+    def __init__(self, names: Sequence[str]) -> None:
+        self.names = sorted(names)
+
+    def _blob(self, name: str) -> BucketWithPrefix:
+        return BucketWithPrefix.from_full_prefix(BUCKET, name, is_blob=True, size=1)
+
+    def list_all_blobs_pages(
+        self,
+        uri: BucketWithPrefix,
+        fields: Sequence[str] = NAME_FIELDS,
+        *,
+        start_offset: Optional[str] = None,
+        end_offset: Optional[str] = None,
+        match_glob: Optional[str] = None,
+    ) -> Iterator[List[BucketWithPrefix]]:
+        low = max(uri.full_prefix, start_offset or "")
+        names = self.names[bisect.bisect_left(self.names, low) :]
+        names = [
+            name
+            for name in names
+            if name.startswith(uri.full_prefix)
+            and (end_offset is None or name < end_offset)
+        ]
+        for i in range(0, len(names), PAGE_SIZE):
+            yield [self._blob(name) for name in names[i : i + PAGE_SIZE]]
+
+    def list_prefix_pages(
+        self, uri: BucketWithPrefix, *, match_glob: Optional[str] = None
+    ) -> Iterator[List[BucketWithPrefix]]:
+        children: dict[str, bool] = {}
+        for name in self.names:
+            if not name.startswith(uri.full_prefix):
+                continue
+            rest = name[len(uri.full_prefix) :]
+            slash = rest.find("/")
+            children[uri.full_prefix + rest[: slash + 1 or None]] = slash < 0
+        yield [
+            BucketWithPrefix.from_full_prefix(BUCKET, child, is_blob=is_blob)
+            for child, is_blob in sorted(children.items())
+        ]
+
+
+def _storage(names: Sequence[str]) -> Any:
+    paged = _PagedStorage(names)
+    storage = mock.Mock(spec=Storage)
+    storage.list_all_blobs_pages.side_effect = paged.list_all_blobs_pages
+    storage.list_prefix_pages.side_effect = paged.list_prefix_pages
+    return storage
+
+
+def _keys(pages: Any) -> list[str]:
+    return [entry.full_prefix for page in pages for entry in page]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"max_workers": 1},
+        {"max_workers": 4},
+        {"max_workers": 4, "pages_per_shard": 1, "split_ways": 8},
+        {"max_workers": 4, "max_buffered_pages": 1},
+        {"max_workers": 4, "max_shards": 2},
+        {"max_workers": 4, "seeds": ["data/beta/", "data/logs/"]},
+    ],
+    ids=["serial", "parallel", "eager-split", "tiny-buffer", "few-shards", "seeds"],
+)
+def test_sharded_listing_matches_the_plain_listing(options: dict[str, Any]) -> None:
+    storage = _storage(_names())
+    uri = BucketWithPrefix.from_full_prefix(BUCKET, "data/")
+    expected = _keys(storage.list_all_blobs_pages(uri, NAME_FIELDS))
+
+    listing = ShardedBlobListing(storage, uri, NAME_FIELDS, **options)
+    # Bounded, so a listing that repeats keys fails instead of running forever.
+    keys = _keys(itertools.islice(listing.pages(), 2 * len(expected)))
+
+    assert keys == expected
+    assert len(set(keys)) == len(keys)
+
+
+def test_split_remaining_range_covers_everything_after_last_key() -> None:
+    ranges = split_remaining_range("data/", "data/a00", "data/a50", "data/z", 4)
+
+    assert 1 < len(ranges) <= 5
+    assert ranges[0][0] == "data/a50\0"
+    assert ranges[-1][1] == "data/z"
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+    assert split_remaining_range("data/", "data/a00", "data/a50", None, 0) == [
+        ("data/a50\0", None)
+    ]
+
+
+def test_disk_usage_counts_every_object_once() -> None:
+    names = _names()
+    uri = BucketWithPrefix.from_full_prefix(BUCKET, "data/")
+    scanner = DiskUsageScanner(
+        uri, _storage(names), seeds=["data/beta/"], max_workers=4, split_ways=4
+    )
+
+    scanner.start()
+    assert scanner.finished.wait(10)
+    result, pending = scanner.snapshot()
+
+    assert scanner.error is None and pending == 0
+    assert sum(usage.objects for usage in result.totals.values()) == sum(
+        name.startswith("data/") for name in names
+    )
+    assert result.totals["logs/"].objects == 39
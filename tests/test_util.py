@@ -0,0 +1,38 @@
+from unittest import mock
+
+from burf.util import LRUCache
+
+
+def test_lru_evicts_least_recently_used() -> None:
+    cache: LRUCache[str, int] = LRUCache(max_entries=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache.get("a") == 1
+    cache["c"] = 3
+
+    assert cache.keys() == ["a", "c"]
+    assert cache.stats.evictions == 1
+
+
+def test_lru_purges_expired_entries_before_evicting_live_ones() -> None:
+    cache: LRUCache[str, int] = LRUCache(max_entries=2)
+    with mock.patch("burf.util.time.monotonic", return_value=100.0):
+        cache.put("short", 1, ttl=1)
+        cache["live"] = 2
+    with mock.patch("burf.util.time.monotonic", return_value=102.0):
+        cache["new"] = 3
+
+        assert cache.keys() == ["live", "new"]
+        assert cache.stats.expirations == 1
+        assert cache.stats.evictions == 0
+
+
+def test_lru_expires_entries_on_read() -> None:
+    cache: LRUCache[str, int] = LRUCache(ttl=1)
+    with mock.patch("burf.util.time.monotonic", return_value=100.0):
+        cache["a"] = 1
+    with mock.patch("burf.util.time.monotonic", return_value=101.0):
+        assert "a" not in cache
+        assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats.expirations == 1